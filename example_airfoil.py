@@ -8,7 +8,7 @@ Evaluate an airfoil;
 Generate a population of airfoils & optimize.
 """
 
-from tools import creator, evaluator, generator
+from tools import creator, evaluator, generator, exporter, report
 
 import time
 start_time = time.time()
@@ -31,6 +31,9 @@ STRINGER_MASS = 5
 SPAR_CAP_AREA = 0.3
 STRINGER_AREA = 0.1
 
+# Distance between ribs (in)
+RIB_SPACING = 24
+
 # Amount of stringers
 TOP_STRINGERS = 6
 BOTTOM_STRINGERS = 4
@@ -72,12 +75,23 @@ af.stringer.info_save(SAVE_PATH, 'foo_name')
 # Plot components with matplotlib
 creator.plot_geom(af, True)
 
+# Export coordinates for XFOIL & SolidWorks
+exporter.write_dat(af, SAVE_PATH + 'airfoil.dat', 'selig')
+exporter.write_xyz_curve(af, SAVE_PATH + 'airfoil_curve.txt')
+exporter.write_loft(exporter.iter_sections(af, range(0, SEMI_SPAN, 10)),
+                    SAVE_PATH + 'wing_loft.csv')
+
 # Evaluator object contains airfoil analysis results.
 eval = evaluator.Evaluator(af)
 # The analysis is performed in the evaluator.py module.
 eval.analysis(1, 1)
+# Stresses & margins of safety for the FAR 23 load factors
+eval.stress_analysis([3.8, -1.5], RIB_SPACING)
 eval.info_print(2)
 eval.info_save(SAVE_PATH, 'foo_name')
+# Structured report, without going through stdout
+with report.Report(SAVE_PATH + 'designs.csv') as rep:
+    rep.write(report.get_summary(eval, design='foo_name'))
 # evaluator.plot_geom(eval)
 evaluator.plot_lift(eval)
 
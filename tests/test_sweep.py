@@ -0,0 +1,21 @@
+"""Tests of generator.sweep() batching."""
+
+import numpy as np
+import pytest
+from tools import generator
+
+
+@pytest.mark.parametrize('n_init, batch', [(5, 20), (30, 20), (20, 20)])
+def test_sweep_evaluates_every_genome_once(monkeypatch, n_init, batch):
+    calls = []
+
+    def evaluate(genes, **kwargs):
+        calls.append(tuple(genes))
+        return np.array([1.0, 1.0, 1.0, 1.0])
+
+    monkeypatch.setattr(generator, 'evaluate', evaluate)
+    genomes = generator.random_genomes(np.random.default_rng(0), 40)
+    # Predictions never flag a design as infeasible (margin = 1 >= 0)
+    results = generator.sweep(genomes, n_init=n_init, batch=batch)
+    assert len(calls) == len(set(calls)) == len(genomes)
+    assert np.all(np.isfinite(results))
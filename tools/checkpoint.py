@@ -0,0 +1,215 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The checkpoint.py module contains a single Checkpoint class,
+which snapshots a generator.Population so that a long run
+can resume after its process dies.
+
+Snapshots are appended to a single file as deltas: only the genome
+& result rows which changed, the surrogate's new designs and the
+design index's new entries are written, along with the full random
+state. Every record is framed by its length & checksum, then flushed
+to disk; a record torn by a crash fails its checksum and is discarded
+on load. A run which did not resume from the file starts it afresh.
+"""
+
+import io
+import os
+import json
+import time
+import zlib
+import struct
+import numpy as np
+from tools import dedup
+
+# Record header: payload length & CRC32 checksum
+HEADER = struct.Struct('<QI')
+
+
+def _changed_rows(new, old):
+    """Return the indices of the rows of new which differ from old."""
+    if old is None or old.shape != new.shape:
+        return np.arange(len(new))
+    same = (new == old) | (np.isnan(new) & np.isnan(old))
+    return np.flatnonzero(~np.all(same, axis=1))
+
+
+class Checkpoint:
+    """Incremental snapshots of a population.
+
+    Parameters:
+    file_path: full path of the checkpoint file.
+    every: snapshot every 'every' generations.
+    interval: also snapshot if 'interval' seconds passed since the last.
+    """
+
+    def __init__(self, file_path, every=1, interval=None):
+        self.file_path = file_path
+        self.every = every
+        self.interval = interval
+        self.n_records = 0
+        # State of the population at the last snapshot
+        self.last_time = time.time()
+        self.last_gen = None
+        self.genomes = None
+        self.results = None
+        self.n_cached = 0
+        self.n_indexed = 0
+
+    def __str__(self):
+        return type(self).__name__
+
+    def due(self, population):
+        """Return True if the population should be snapshot now."""
+        if self.last_gen is None:
+            return True
+        if population.gen_number - self.last_gen >= self.every:
+            return True
+        return (self.interval is not None
+                and time.time() - self.last_time >= self.interval)
+
+    def update(self, population):
+        """Snapshot the population if due; return True if it was."""
+        if not self.due(population):
+            return False
+        self.save(population)
+        return True
+
+    def save(self, population):
+        """Append a delta snapshot of the population to the file.
+
+        The first snapshot of an instance which did not load() the file
+        replaces its previous content instead.
+        """
+        genome_rows = _changed_rows(population.genomes, self.genomes)
+        result_rows = _changed_rows(population.results, self.results)
+        cache_X = population.surrogate.X[self.n_cached:]
+        cache_Y = population.surrogate.Y[self.n_cached:]
+        # The index keeps its insertion order: new entries come last.
+        keys, index_results = population.index.get_results()
+        keys = keys[self.n_indexed:]
+        index_results = index_results[self.n_indexed:]
+        meta = {'rng': population.get_rng_state(),
+                'size': population.size,
+                'n_fit': population.surrogate.n_fit,
+                'hits': population.index.hits,
+                'time': time.time()}
+
+        buffer = io.BytesIO()
+        np.savez(buffer, meta=np.array(json.dumps(meta)),
+                 genome_rows=genome_rows,
+                 genomes=population.genomes[genome_rows],
+                 result_rows=result_rows,
+                 results=population.results[result_rows],
+                 cache_X=cache_X, cache_Y=cache_Y,
+                 index_keys=np.array(keys, dtype=str),
+                 index_results=index_results)
+        payload = buffer.getvalue()
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        # Deltas only follow the snapshots this instance saved or loaded.
+        if self.last_gen is None and os.path.exists(self.file_path):
+            print('Discarding previous snapshots in {}'.format(
+                self.file_path))
+            mode = 'wb'
+        else:
+            mode = 'ab'
+        # A single write, flushed to disk before the snapshot counts
+        with open(self.file_path, mode) as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.n_records += 1
+        self.last_time = time.time()
+        self.last_gen = population.gen_number
+        self.genomes = population.genomes.copy()
+        self.results = population.results.copy()
+        self.n_cached = len(population.surrogate)
+        self.n_indexed = len(population.index)
+        return None
+
+    def _records(self):
+        """Yield (end offset, payload) of every complete record."""
+        with open(self.file_path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + HEADER.size <= len(data):
+            length, crc = HEADER.unpack_from(data, offset)
+            start = offset + HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset = start + length
+            yield offset, payload
+
+    def load(self, population):
+        """Restore the population from the latest complete snapshot.
+
+        A torn record left by a crash is truncated from the file,
+        so that following snapshots append after the last good one.
+
+        Return:
+        True if a snapshot was found.
+        """
+        if not os.path.exists(self.file_path):
+            return False
+        genomes = results = meta = None
+        cache_X, cache_Y = [], []
+        index = dedup.DesignIndex()
+        end = 0
+        for end, payload in self._records():
+            record = np.load(io.BytesIO(payload))
+            meta = json.loads(str(record['meta']))
+            if genomes is None or len(genomes) != meta['size']:
+                genomes = np.empty((meta['size'], record['genomes'].shape[1]))
+                results = np.full((meta['size'], record['results'].shape[1]),
+                                  np.nan)
+            genomes[record['genome_rows']] = record['genomes']
+            results[record['result_rows']] = record['results']
+            if len(record['cache_X']):
+                cache_X.append(record['cache_X'])
+                cache_Y.append(record['cache_Y'])
+            for key, result in zip(record['index_keys'],
+                                   record['index_results']):
+                index.add(str(key), result)
+            self.n_records += 1
+        if os.path.getsize(self.file_path) > end:
+            print('Discarding torn snapshot in {}'.format(self.file_path))
+            with open(self.file_path, 'r+b') as f:
+                f.truncate(end)
+        if meta is None:
+            return False
+
+        population.size = meta['size']
+        population.genomes = genomes
+        population.results = results
+        population.set_rng_state(meta['rng'])
+        if cache_X:
+            population.surrogate.X = np.vstack(cache_X)
+            population.surrogate.Y = np.vstack(cache_Y)
+            # Same fit as at the snapshot, refit on the same schedule
+            population.surrogate.n_fit = 0
+            if meta['n_fit']:
+                population.surrogate.fit(meta['n_fit'])
+        index.hits = meta['hits']
+        population.index = index
+
+        self.last_time = time.time()
+        self.last_gen = population.gen_number
+        self.genomes = genomes.copy()
+        self.results = results.copy()
+        self.n_cached = len(population.surrogate)
+        self.n_indexed = len(population.index)
+        return True
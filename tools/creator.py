@@ -22,6 +22,7 @@ Classes:
     Stringer: also inherits from Airfoil.
 
 Functions:
+    get_stations(chord): chordwise stations used to panel the surfaces.
     plot_geom(airfoil): generates a 2D plot of the airfoil & any components.
 """
 
@@ -31,6 +32,20 @@ import numpy as np
 from math import sin, cos, atan
 import bisect as bi
 import matplotlib.pyplot as plt
+from tools import importer
+
+# Material properties (psi, lb/in^3), from MIL-HDBK-5 A-basis values.
+# E: Young's modulus; nu: Poisson's ratio; rho: density;
+# F_tu, F_ty, F_su: ultimate tensile, tensile yield & ultimate shear stress.
+MATERIALS = {
+    '2024-T3': {'E': 10.5e6, 'nu': 0.33, 'rho': 0.100,
+                'F_tu': 64e3, 'F_ty': 47e3, 'F_su': 39e3},
+    '6061-T6': {'E': 9.9e6, 'nu': 0.33, 'rho': 0.098,
+                'F_tu': 42e3, 'F_ty': 35e3, 'F_su': 27e3},
+    '7075-T6': {'E': 10.3e6, 'nu': 0.33, 'rho': 0.101,
+                'F_tu': 78e3, 'F_ty': 69e3, 'F_su': 47e3},
+}
+DEFAULT_MATERIAL = '2024-T3'
 
 
 class Airfoil:
@@ -140,15 +155,7 @@ class Airfoil:
             z = get_camber(x) - get_thickness(x) * cos(get_theta(x))
             return (x, z)
 
-        # Densify x-coordinates 10 times for first 1/4 chord length
-        x_chord_25_percent = round(self.chord / 4)
-
-        x_chord = [i / 10 for i in range(x_chord_25_percent * 10)]
-        x_chord.extend(i for i in range(x_chord_25_percent, self.chord + 1))
-        # Reversed list for our lower airfoil coordinate densification
-        x_chord_rev = [i for i in range(self.chord, x_chord_25_percent, -1)]
-        extend = [i / 10 for i in range(x_chord_25_percent * 10, -1, -1)]
-        x_chord_rev.extend(extend)
+        x_chord, x_chord_rev = get_stations(self.chord)
 
         # Generate our airfoil geometry from previous sub-functions.
         self.x_c = []
@@ -163,9 +170,44 @@ class Airfoil:
             self.z.append(get_lower_coord(x)[1])
         return None
 
+    def add_dat(self, file_path):
+        """Generate surface geometry from a Selig or Lednicer '.dat' file.
+
+        The file's coordinates are re-panelled onto the same stations
+        as add_naca(), so that spars, stringers and the evaluator
+        treat imported airfoils exactly like NACA airfoils.
+
+        Parameters:
+        file_path: full path of the coordinate file.
+
+        Return:
+        None
+        """
+        name, upper, lower = importer.read_dat(file_path)
+        self.naca_num = name
+        x_chord, x_chord_rev = get_stations(self.chord)
+        z_u, z_l = importer.repanel(upper, lower, x_chord)
+
+        self.x_c = list(x_chord)
+        self.z_c = list((z_u + z_l) / 2)
+        self.x = list(x_chord) + list(x_chord_rev)
+        self.z = list(z_u) + list(z_l[::-1])
+        return None
+
     def add_mass(self, mass):
         self.mass = mass
 
+    def add_material(self, material):
+        """Set the component's material, which must exist in MATERIALS."""
+        if material not in MATERIALS:
+            raise ValueError('Unknown material: {}'.format(material))
+        self.material = material
+        return None
+
+    def get_material(self):
+        """Return the properties of the component's material."""
+        return MATERIALS[self.material or DEFAULT_MATERIAL]
+
     def info_print(self, round):
         """Print all the component's coordinates to the terminal."""
         name = '    CREATOR DATA FOR {}    '.format(str(self).upper())
@@ -348,6 +390,23 @@ class Stringer(Airfoil):
         return None
 
 
+def get_stations(chord):
+    """Return the chordwise stations of the upper & lower surfaces.
+
+    Stations are densified 10 times for the first 1/4 chord length.
+    The upper stations run from the LE to the TE, the lower ones back.
+    """
+    x_chord_25_percent = round(chord / 4)
+
+    x_chord = [i / 10 for i in range(x_chord_25_percent * 10)]
+    x_chord.extend(i for i in range(x_chord_25_percent, chord + 1))
+    # Reversed list for our lower airfoil coordinate densification
+    x_chord_rev = [i for i in range(chord, x_chord_25_percent, -1)]
+    extend = [i / 10 for i in range(x_chord_25_percent * 10, -1, -1)]
+    x_chord_rev.extend(extend)
+    return x_chord, x_chord_rev
+
+
 def plot_geom(airfoil, view: False):
     """This function plots the airfoil's + sub-components' geometry."""
     fig, ax = plt.subplots()
@@ -0,0 +1,99 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The dedup.py module identifies physically identical designs.
+
+Stringers snap to the nearest surface points, so different genomes
+often produce the same set of booms. A design's key hashes its booms
+(quantized positions & areas), in a canonical order.
+
+Classes:
+    DesignIndex: hash index of the results of every unique design.
+
+Functions:
+    get_booms(airfoil): (n, 3) array of boom x, z & area.
+    get_key(airfoil, decimals): canonical key of an airfoil's layout.
+"""
+
+import hashlib
+import numpy as np
+
+
+def get_booms(airfoil):
+    """Return the x, z & area of every spar cap & stringer, one per row."""
+    caps = [(x, z, airfoil.spar.cap_area)
+            for xs, zs in zip(airfoil.spar.x, airfoil.spar.z)
+            for x, z in zip(xs, zs)]
+    stringers = [(x, z, airfoil.stringer.area)
+                 for x, z in zip(airfoil.stringer.x, airfoil.stringer.z)]
+    return np.array(caps + stringers, dtype=float)
+
+
+def get_key(airfoil, decimals=6):
+    """Return the canonical key of an airfoil's boom layout.
+
+    Booms are quantized to 'decimals' decimals, then sorted,
+    so that the key does not depend on the order of placement.
+    Spars are keyed separately since they also carry the webs.
+    """
+    booms = np.round(get_booms(airfoil), decimals) + 0.0
+    n_caps = sum(len(x) for x in airfoil.spar.x)
+    caps = booms[:n_caps][np.lexsort(booms[:n_caps].T[::-1])]
+    stringers = booms[n_caps:][np.lexsort(booms[n_caps:].T[::-1])]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(caps.tobytes())
+    digest.update(b'|')
+    digest.update(stringers.tobytes())
+    return digest.hexdigest()
+
+
+class DesignIndex:
+    """Results of every unique design evaluated so far, by key.
+
+    An index is only valid for one set of load cases.
+    """
+
+    def __init__(self):
+        self.results = {}
+        # Number of lookups answered from the index
+        self.hits = 0
+
+    def __str__(self):
+        return type(self).__name__
+
+    def __len__(self):
+        return len(self.results)
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def get(self, key):
+        """Return the results of a design, None if it is unknown."""
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def add(self, key, result):
+        """Record the results of a design."""
+        self.results[key] = np.asarray(result, dtype=float)
+        return None
+
+    def get_results(self):
+        """Return the keys & (n, n_results) results of unique designs."""
+        keys = list(self.results)
+        if not keys:
+            return keys, np.empty((0, 0))
+        return keys, np.vstack([self.results[key] for key in keys])
@@ -22,8 +22,8 @@ and contains functions to analyse the airfoil's geometrical
 import sys
 import os.path
 import numpy as np
-from math import sqrt
 import matplotlib.pyplot as plt
+from tools import loads, sizing
 
 
 class Evaluator:
@@ -52,6 +52,11 @@ class Evaluator:
         self.centroid = []
         # Inertia terms:
         self.I_ = {'x': 0, 'z': 0, 'xz': 0}
+        # Stresses (load case, spanwise station, boom) & margins of safety
+        self.stress = np.empty(0)
+        self.shear = {'spar': np.empty(0), 'skin': np.empty(0)}
+        self.margin = np.empty(0)
+        self.margin_min = float()
 
     def __str__(self):
         return type(self).__name__
@@ -87,18 +92,29 @@ class Evaluator:
                     file_name), 'Was the full path passed to the function?')
         return None
 
+    def get_loads(self, model, magnitudes, q=None):
+        """Return the (case, station) spanwise loads of a load model.
+
+        Parameters:
+        model: name in loads.MODELS, load model function or LiftingLine.
+        magnitudes: total semi-span load of every flight condition.
+        q: dynamic pressure of every flight condition (LiftingLine only).
+        """
+        y = np.arange(self.semi_span)
+        return loads.get_loads(model, y, self.semi_span, magnitudes, q)
+
+    def _get_legacy(self, model, root):
+        """Return a load model scaled to a given value at the root."""
+        shape = self.get_loads(model, 1)[0]
+        return (root * shape / shape[0]).tolist()
+
     # All these functions take integer arguments and return lists.
 
     def get_lift_rectangular(self, lift):
-        L_prime = [lift / (self.semi_span * 2) for x in range(self.semi_span)]
-        return L_prime
+        return self._get_legacy('rectangular', lift / (self.semi_span * 2))
 
     def get_lift_elliptical(self, L_0):
-        L_prime = [
-            L_0 / (self.semi_span * 2) * sqrt(1 - (y / self.semi_span)**2)
-            for y in range(self.semi_span)
-        ]
-        return L_prime
+        return self._get_legacy('elliptical', L_0 / (self.semi_span * 2))
 
     def get_lift_total(self):
         F_z = [(self.lift_rectangular[_] + self.lift_elliptical[_]) / 2
@@ -110,16 +126,8 @@ class Evaluator:
         return F_z
 
     def get_drag(self, drag):
-        # Transform semi-span integer into list
-        semi_span = [x for x in range(0, self.semi_span)]
-
-        # Drag increases after 80% of the semi_span
-        cutoff = round(0.8 * self.semi_span)
-
         # Drag increases by 25% after 80% of the semi_span
-        F_x = [drag for x in semi_span[0:cutoff]]
-        F_x.extend([1.25 * drag for x in semi_span[cutoff:]])
-        return F_x
+        return self._get_legacy('step', drag)
 
     def get_centroid(self):
         """Return the coordinates of the centroid."""
@@ -196,12 +204,195 @@ class Evaluator:
                        / denom)
         return z
 
-    def analysis(self, V_x, V_z):
-        """Perform all analysis calculations and store in class instance."""
+    def get_booms(self):
+        """Return the x, z coordinates & areas of all booms as arrays.
+
+        Spar caps come first (upper then lower cap of every spar),
+        followed by the stringers.
+        """
+        caps_x = [value for spar in self.spar.x for value in spar]
+        caps_z = [value for spar in self.spar.z for value in spar]
+        x = np.array(caps_x + list(self.stringer.x), dtype=float)
+        z = np.array(caps_z + list(self.stringer.z), dtype=float)
+        area = np.empty(len(x))
+        area[:len(caps_x)] = self.spar.cap_area
+        area[len(caps_x):] = self.stringer.area
+        return x, z, area
+
+    def get_spanwise_loads(self, w):
+        """Integrate a distributed load from the tip towards the root.
+
+        Parameters:
+        w: load per unit span at every spanwise station.
+
+        Return:
+        V: shear force at every station.
+        M: bending moment at every station.
+        """
+        w = np.asarray(w, dtype=float)
+        y = np.arange(w.shape[-1], dtype=float)
+        # Cumulative sums from the tip: V(y) = sum(w), M(y) = sum(w (y' - y))
+        V = np.cumsum(w[..., ::-1], axis=-1)[..., ::-1]
+        M = np.cumsum((w * y)[..., ::-1], axis=-1)[..., ::-1] - y * V
+        return V, M
+
+    def get_bending_stress(self, M_x, M_z):
+        """Return the bending stress at every boom (unsymmetric bending).
+
+        M_x is the moment created by lift, M_z the moment created by drag;
+        both may be arrays of any shape, booms are added as the last axis.
+        Positive M_x compresses the upper surface.
+        The centroid & inertia terms are those of every boom returned
+        by get_booms(), including the caps of every spar.
+        """
+        x, z, area = self.get_booms()
+        (c_x, c_z), (I_x, I_z, I_xz) = sizing.get_section_properties(
+            x, z, area)
+        x = x - c_x
+        z = z - c_z
+        denom = float(I_x * I_z - I_xz ** 2)
+        M_x = np.asarray(M_x, dtype=float)[..., np.newaxis]
+        M_z = np.asarray(M_z, dtype=float)[..., np.newaxis]
+        return -((I_x * M_z - I_xz * M_x) * x
+                 + (I_z * M_x - I_xz * M_z) * z) / denom
+
+    def get_web_shear(self, V_x, V_z):
+        """Return the average shear stress in the spar webs & skin.
+
+        Spar webs react V_z; the upper & lower skins between
+        the first and last spar react V_x.
+        """
+        heights = np.array([abs(z[0] - z[1]) for z in self.spar.z])
+        spar_area = float(np.sum(heights) * self.spar.thickness)
+        skin_width = abs(self.spar.x[-1][0] - self.spar.x[0][0])
+        skin_area = float(2 * skin_width * self.stringer.thickness)
+        tau_spar = np.asarray(V_z, dtype=float) / spar_area
+        tau_skin = np.asarray(V_x, dtype=float) / skin_area
+        return tau_spar, tau_skin
+
+    def get_allowables(self, rib_spacing):
+        """Return the allowable stresses of every boom & web.
+
+        Compression is limited by the smallest of the material's yield
+        stress, the Euler column buckling stress between two ribs,
+        and the buckling stress of the skin panel next to the boom.
+        Stringers are assumed square (r^2 = A / 12);
+        skin panels are assumed simply supported (k_c = 4).
+        Webs are limited by the von Mises shear yield stress.
+
+        Return:
+        dictionary of per boom arrays 'F_ty' (yield stress), 'column'
+        (column buckling stress per unit boom area) & 'skin' (panel
+        buckling stress), and shear yield stresses 'spar' & 'skin_shear'.
+        """
+        x, z, _ = self.get_booms()
+        spar_mat = self.spar.get_material()
+        stringer_mat = self.stringer.get_material()
+        n_caps = 2 * len(self.spar.x)
+        E = np.full(len(x), stringer_mat['E'])
+        E[:n_caps] = spar_mat['E']
+        F_ty = np.full(len(x), stringer_mat['F_ty'])
+        F_ty[:n_caps] = spar_mat['F_ty']
+
+        # Skin buckling, panel width is the distance to the nearest boom
+        dist = np.hypot(x[:, np.newaxis] - x, z[:, np.newaxis] - z)
+        np.fill_diagonal(dist, np.inf)
+        b = dist.min(axis=1)
+        t = self.stringer.thickness
+        sigma_skin = (4 * np.pi**2 * stringer_mat['E']
+                      / (12 * (1 - stringer_mat['nu']**2)) * (t / b)**2)
+        return {'F_ty': F_ty,
+                'column': np.pi**2 * E / (12 * rib_spacing**2),
+                'skin': sigma_skin,
+                'spar': spar_mat['F_ty'] / np.sqrt(3),
+                'skin_shear': stringer_mat['F_ty'] / np.sqrt(3)}
+
+    def get_buckling_stress(self, rib_spacing):
+        """Return the compressive allowable stress at every boom.
+
+        See get_allowables() for the failure modes considered.
+        """
+        _, _, area = self.get_booms()
+        allow = self.get_allowables(rib_spacing)
+        return np.minimum(allow['F_ty'], np.minimum(allow['column'] * area,
+                                                    allow['skin']))
+
+    def get_margins(self, sigma, tau_spar, tau_skin, rib_spacing):
+        """Return the minimum margin of safety of every section.
+
+        Parameters:
+        sigma: bending stresses, booms along the last axis.
+        tau_spar, tau_skin: web shear stresses, same shape as sigma[..., 0].
+        rib_spacing: distance between ribs (column length).
+
+        Return:
+        margin: minimum margin of safety, same shape as sigma[..., 0].
+
+        All allowables are on a yield basis (see get_allowables()):
+        F_ty in tension, get_buckling_stress() in compression,
+        and the von Mises shear yield stress F_ty / sqrt(3) in the webs.
+        sizing.Sizer constrains the same allowables.
+        """
+        allow = self.get_allowables(rib_spacing)
+        F_cc = self.get_buckling_stress(rib_spacing)
+
+        allowable = np.where(sigma >= 0, allow['F_ty'], F_cc)
+        with np.errstate(divide='ignore'):
+            ms_boom = (allowable / np.abs(sigma) - 1).min(axis=-1)
+            ms_spar = allow['spar'] / np.abs(tau_spar) - 1
+            ms_skin = allow['skin_shear'] / np.abs(tau_skin) - 1
+        return np.minimum(ms_boom, np.minimum(ms_spar, ms_skin))
+
+    def stress_analysis(self, load_factors=(1,), rib_spacing=24,
+                        lift_model=None, q=None):
+        """Compute stresses & margins of safety for several load cases.
+
+        analysis() must be called first. Every load case scales the
+        spanwise lift & drag distributions by its load factor.
+
+        Parameters:
+        load_factors: load factor of every load case.
+        rib_spacing: distance between ribs.
+        lift_model: if given, redistributes every case's total lift
+                    (see get_loads()), e.g. a loads.LiftingLine.
+        q: dynamic pressure of every load case, required by a
+           twisted loads.LiftingLine.
+
+        Return:
+        None
+        """
+        n = np.asarray(load_factors, dtype=float)[:, np.newaxis]
+        if lift_model is None:
+            V_z, M_x = self.get_spanwise_loads(n * self.lift_total)
+        else:
+            lift = n[:, 0] * np.sum(self.lift_total)
+            V_z, M_x = self.get_spanwise_loads(
+                self.get_loads(lift_model, lift, q))
+        V_x, M_z = self.get_spanwise_loads(n * self.drag)
+        # Stresses are linear in the loads: (load case, station, boom)
+        self.stress = self.get_bending_stress(M_x, M_z)
+        tau_spar, tau_skin = self.get_web_shear(V_x, V_z)
+        self.shear = {'spar': tau_spar, 'skin': tau_skin}
+        self.margin = self.get_margins(self.stress, tau_spar, tau_skin,
+                                       rib_spacing)
+        self.margin_min = float(self.margin.min())
+        return None
+
+    def analysis(self, V_x, V_z, lift_model=None, lift=13.7, q=None):
+        """Perform all analysis calculations and store in class instance.
+
+        The total lift is the average of the rectangular & elliptical
+        distributions, unless a lift_model & its total semi-span lift
+        are given (with the dynamic pressure q for a twisted wing).
+        """
         self.drag = self.get_drag(10)
         self.lift_rectangular = self.get_lift_rectangular(13.7)
         self.lift_elliptical = self.get_lift_elliptical(15)
-        self.lift_total = self.get_lift_total()
+        if lift_model is None:
+            self.lift_total = self.get_lift_total()
+        else:
+            self.lift_total = self.get_loads(lift_model, lift,
+                                             q)[0].tolist()
         self.mass_dist = self.get_mass_distribution(self.mass_total)
         self.centroid = self.get_centroid()
         self.I_['x'] = self.get_inertia_terms()[0]
@@ -0,0 +1,183 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The exporter.py module writes airfoil coordinates to files which
+can be read by other programs (XFOIL, SolidWorks, ...).
+
+Sections are produced by generators, and every section is formatted
+as a single block of text before being written, so that exporting
+a full wing with thousands of sections keeps a flat memory footprint.
+
+Functions:
+    get_surfaces(airfoil): split coordinates into upper & lower surfaces.
+    get_section(airfoil, y, scale): 3D coordinates of one wing section.
+    iter_sections(airfoil, stations, scales): generator of wing sections.
+    write_dat(airfoil, file_path, fmt): unit chord Selig or Lednicer file.
+    write_xyz_curve(airfoil, file_path, y): SolidWorks XYZ curve file.
+    write_loft(sections, file_path): multi-section loft file.
+"""
+
+import numpy as np
+
+# Write buffer size (bytes)
+BUFFER_SIZE = 1 << 20
+
+
+def get_surfaces(airfoil):
+    """Return the upper & lower surfaces as (2, n) arrays.
+
+    Both surfaces run from the leading edge to the trailing edge.
+    The upper surface has one point per camber line station.
+    """
+    x = np.asarray(airfoil.x, dtype=float)
+    z = np.asarray(airfoil.z, dtype=float)
+    n_upper = len(airfoil.x_c)
+    upper = np.vstack((x[:n_upper], z[:n_upper]))
+    lower = np.vstack((x[n_upper:], z[n_upper:]))[:, ::-1]
+    return upper, lower
+
+
+def get_section(airfoil, y=0.0, scale=1.0):
+    """Return the (n, 3) XYZ coordinates of one wing section.
+
+    Parameters:
+    airfoil: airfoil whose coordinates are exported.
+    y: spanwise location of the section.
+    scale: section chord relative to the airfoil's chord.
+
+    Return:
+    xyz: section coordinates, in the same order as the airfoil's.
+    """
+    xyz = np.empty((len(airfoil.x), 3))
+    xyz[:, 0] = airfoil.x
+    xyz[:, 1] = y
+    xyz[:, 2] = airfoil.z
+    xyz[:, 0::2] *= scale
+    return xyz
+
+
+def iter_sections(airfoil, stations, scales=None):
+    """Yield (y, xyz) for every spanwise station of the wing.
+
+    Only one section exists in memory at any given time.
+    """
+    if scales is None:
+        scales = np.ones(len(stations))
+    for y, scale in zip(stations, scales):
+        yield y, get_section(airfoil, y, scale)
+
+
+def _format_block(array, fmt):
+    """Format a 2D array as a single string, one row per line."""
+    array = np.asarray(array, dtype=float)
+    if array.size == 0:
+        return ''
+    return (fmt * len(array)) % tuple(array.ravel())
+
+
+def write_dat(airfoil, file_path, fmt='selig', round=6):
+    """Write the airfoil coordinates to a '.dat' file.
+
+    Parameters:
+    airfoil: airfoil whose coordinates are exported.
+    file_path: full path of the file to be written.
+    fmt: 'selig' (TE -> upper -> LE -> lower -> TE) or
+         'lednicer' (upper & lower surfaces listed from the LE).
+    round: number of decimals written.
+
+    Coordinates are written for a unit chord, as is customary.
+    The header is the airfoil's name: 'NACA' followed by the number
+    of airfoils from add_naca(), the stored name as is otherwise
+    (e.g. the name of a file read by add_dat()).
+
+    Return:
+    None
+    """
+    upper, lower = get_surfaces(airfoil)
+    upper = upper / airfoil.chord
+    lower = lower / airfoil.chord
+    row = '%.{0}f %.{0}f\n'.format(round)
+    name = str(getattr(airfoil, 'naca_num', ''))
+    if name.isdigit():
+        name = 'NACA ' + name
+    header = name + '\n'
+    if fmt == 'selig':
+        # Skip the duplicate leading edge point of the lower surface.
+        coord = np.hstack((upper[:, ::-1], lower[:, 1:])).T
+        text = header + _format_block(coord, row)
+    elif fmt == 'lednicer':
+        text = (header
+                + '{}. {}.\n\n'.format(upper.shape[1], lower.shape[1])
+                + _format_block(upper.T, row) + '\n'
+                + _format_block(lower.T, row))
+    else:
+        raise ValueError('Unknown .dat format: {}'.format(fmt))
+    try:
+        with open(file_path, 'w', buffering=BUFFER_SIZE) as f:
+            f.write(text)
+            print('Successfully wrote to file {}'.format(file_path))
+    except IOError:
+        print('Unable to write {}.\n'.format(file_path),
+              'Was the full path passed to the function?')
+    return None
+
+
+def write_xyz_curve(airfoil, file_path, y=0.0, round=6):
+    """Write a single section as a SolidWorks 'Curve Through XYZ Points'.
+
+    The curve is closed by repeating the first point.
+    """
+    xyz = get_section(airfoil, y)
+    xyz = np.vstack((xyz, xyz[:1]))
+    row = '%.{0}f,%.{0}f,%.{0}f\n'.format(round)
+    try:
+        with open(file_path, 'w', buffering=BUFFER_SIZE) as f:
+            f.write(_format_block(xyz, row))
+            print('Successfully wrote to file {}'.format(file_path))
+    except IOError:
+        print('Unable to write {}.\n'.format(file_path),
+              'Was the full path passed to the function?')
+    return None
+
+
+def write_loft(sections, file_path, round=6):
+    """Stream wing sections to a single multi-section loft CSV file.
+
+    Parameters:
+    sections: iterable of (y, xyz), e.g. from iter_sections().
+    file_path: full path of the file to be written.
+    round: number of decimals written.
+
+    Each line reads 'section,x,y,z'; sections are consumed one at a time.
+
+    Return:
+    Number of sections written.
+    """
+    row = '%d,%.{0}f,%.{0}f,%.{0}f\n'.format(round)
+    count = 0
+    try:
+        with open(file_path, 'w', buffering=BUFFER_SIZE) as f:
+            f.write('section,x,y,z\n')
+            for count, (_, xyz) in enumerate(sections, 1):
+                block = np.empty((len(xyz), 4))
+                block[:, 0] = count
+                block[:, 1:] = xyz
+                f.write(_format_block(block, row))
+            print('Successfully wrote {} sections to file {}'.format(
+                count, file_path))
+    except IOError:
+        print('Unable to write {}.\n'.format(file_path),
+              'Was the full path passed to the function?')
+    return count
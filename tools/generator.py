@@ -15,9 +15,27 @@
 """
 The generator.py module contains a single Population class,
 which represents a collection of randomized airfoils.
+
+An individual's genome is an array of the parameters listed in GENES;
+new_airfoil() builds the corresponding airfoil & evaluate() rates it.
 """
 
-from tools import creator
+import time
+import numpy as np
+from functools import lru_cache
+from tools import creator, evaluator, surrogate, dedup
+
+# Genome layout: spar locations (% chord), stringer counts & areas
+GENES = ('spar_1', 'spar_2',
+         'stringer_u_1', 'stringer_u_2', 'stringer_l_1', 'stringer_l_2',
+         'cap_area', 'stringer_area')
+# Lower & upper bound of every gene, and genes which are integers
+BOUNDS = np.array([[0.15, 0.35], [0.45, 0.70],
+                   [1, 6], [1, 10], [1, 6], [1, 10],
+                   [0.05, 2.0], [0.02, 1.0]])
+INTEGER = np.array([False, False, True, True, True, True, False, False])
+# Evaluation results, one column each
+RESULTS = ('mass', 'I_x', 'I_z', 'margin')
 
 
 def default_airfoil():
@@ -42,20 +60,274 @@ def default_airfoil():
     return airfoil
 
 
+@lru_cache(maxsize=256)
+def get_surface(naca_num, chord):
+    """Return the (x, z, x_c, z_c) surface geometry of a NACA airfoil.
+
+    The surface only depends on the NACA number & chord, so the most
+    recently used ones are kept instead of calling add_naca() again.
+    """
+    airfoil = creator.Airfoil.from_dimensions(chord, creator.Airfoil.semi_span)
+    airfoil.add_naca(naca_num)
+    return (tuple(airfoil.x), tuple(airfoil.z),
+            tuple(airfoil.x_c), tuple(airfoil.z_c))
+
+
+def new_airfoil(genes, naca_num=2412, chord=100, semi_span=200):
+    """Generate an airfoil from a genome (see GENES).
+
+    Component masses follow from the areas & the materials' density.
+    """
+    spar_1, spar_2, u_1, u_2, l_1, l_2, cap_area, stringer_area = genes
+    airfoil = creator.Airfoil.from_dimensions(chord, semi_span)
+    airfoil.naca_num = naca_num
+    x, z, x_c, z_c = get_surface(naca_num, chord)
+    airfoil.x, airfoil.z = list(x), list(z)
+    airfoil.x_c, airfoil.z_c = list(x_c), list(z_c)
+    airfoil.add_mass(10)
+
+    airfoil.spar = creator.Spar()
+    airfoil.spar.add_coord(airfoil, spar_1)
+    airfoil.spar.add_coord(airfoil, spar_2)
+    airfoil.spar.add_spar_caps(cap_area)
+    rho = airfoil.spar.get_material()['rho']
+    # Two caps per spar
+    airfoil.spar.add_mass(2 * rho * cap_area * airfoil.semi_span)
+    airfoil.spar.add_webs(0.4)
+
+    airfoil.stringer = creator.Stringer()
+    airfoil.stringer.add_coord(airfoil, int(u_1), int(u_2),
+                               int(l_1), int(l_2))
+    airfoil.stringer.add_area(stringer_area)
+    rho = airfoil.stringer.get_material()['rho']
+    # Stringer.add_mass() counts every stringer twice
+    airfoil.stringer.add_mass(rho * stringer_area * airfoil.semi_span / 2)
+    airfoil.stringer.add_webs(0.1)
+    return airfoil
+
+
+def evaluate(genes, load_factors=(3.8, -1.5), airfoil=None, **kwargs):
+    """Fully evaluate a genome, return its results (see RESULTS).
+
+    airfoil is the genome's airfoil, if new_airfoil() already built it.
+    """
+    af = new_airfoil(genes, **kwargs) if airfoil is None else airfoil
+    ev = evaluator.Evaluator(af)
+    ev.analysis(1, 1)
+    ev.stress_analysis(load_factors)
+    return np.array([ev.mass_total, ev.I_['x'], ev.I_['z'], ev.margin_min])
+
+
+def get_keys(genomes, naca_num=2412, chord=100, semi_span=200):
+    """Return the canonical layout key of every genome (see dedup)."""
+    return [dedup.get_key(new_airfoil(genes, naca_num, chord, semi_span))
+            for genes in genomes]
+
+
+def get_targets(results):
+    """Return the outputs regressed by the surrogate from results.
+
+    The margin of safety is replaced by the log of the reserve factor,
+    log(1 + margin): a far smoother function of the genes, which is
+    also positive for feasible designs.
+    """
+    targets = np.array(results, dtype=float)
+    margin = targets[..., RESULTS.index('margin')]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        targets[..., RESULTS.index('margin')] = np.log1p(margin)
+    return targets
+
+
+def sweep(genomes, model=None, n_init=20, batch=20, slack=None, index=None,
+          **kwargs):
+    """Evaluate many genomes, skipping those a surrogate deems infeasible.
+
+    The first n_init genomes are always evaluated if the surrogate is
+    empty; the following ones are screened by batches, and the results
+    of every batch are added to the surrogate (see get_targets()).
+    Screening is skipped while predicting a design costs more than
+    evaluating it.
+
+    If a dedup.DesignIndex is given, genomes producing the same booms
+    are evaluated once, and designs already in the index are not
+    evaluated again. The airfoil built for a genome's key is the one
+    evaluated, so deduplication never builds an airfoil twice.
+
+    Parameters:
+    genomes: (n, len(GENES)) array of genomes.
+    model: surrogate.Surrogate instance, a new one by default.
+    n_init: number of genomes evaluated before any screening.
+    batch: number of genomes screened at once.
+    slack: log reserve factor below zero still worth evaluating,
+           derived from the surrogate's held-out residuals by default.
+    index: dedup.DesignIndex of the designs evaluated so far.
+
+    Return:
+    results: (n, len(RESULTS)) array, NaN for skipped genomes.
+    """
+    genomes = np.atleast_2d(np.asarray(genomes, dtype=float))
+    if model is None:
+        model = surrogate.Surrogate()
+    layout = {k: v for k, v in kwargs.items()
+              if k in ('naca_num', 'chord', 'semi_span')}
+    results = np.full((len(genomes), len(RESULTS)), np.nan)
+    # Key of every genome & first row of every key, when deduplicating
+    keys = [None] * len(genomes)
+    first = {}
+    duplicates = []
+    # Mean time of a full evaluation, compared to a surrogate prediction
+    eval_time = 0.0
+    n_evals = 0
+    start = 0
+    while start < len(genomes):
+        stop = min(start + batch, len(genomes))
+        if len(model) == 0:
+            stop = min(max(n_init, 1), len(genomes))
+        rows = np.arange(start, stop)
+        airfoils = {}
+        if index is not None:
+            new = []
+            for i in rows:
+                airfoil = new_airfoil(genomes[i], **layout)
+                keys[i] = dedup.get_key(airfoil)
+                if keys[i] in first:
+                    duplicates.append(i)
+                    continue
+                first[keys[i]] = i
+                known = index.get(keys[i])
+                if known is not None:
+                    results[i] = known
+                else:
+                    airfoils[i] = airfoil
+                    new.append(i)
+            rows = np.array(new, dtype=int)
+        if len(rows) and n_evals and model.cost < eval_time / n_evals:
+            rows = rows[model.screen(genomes[rows], RESULTS.index('margin'),
+                                     slack=slack)]
+        tic = time.perf_counter()
+        for i in rows:
+            results[i] = evaluate(genomes[i], airfoil=airfoils.get(i),
+                                  **kwargs)
+        eval_time += time.perf_counter() - tic
+        n_evals += len(rows)
+        model.add(genomes[rows], get_targets(results[rows]))
+        if index is not None:
+            for i in rows:
+                if np.all(np.isfinite(results[i])):
+                    index.add(keys[i], results[i])
+        start = stop
+    for i in duplicates:
+        results[i] = results[first[keys[i]]]
+    return results
+
+
+def random_genomes(rng, n):
+    """Draw n random genomes within BOUNDS from a numpy Generator."""
+    genomes = rng.uniform(BOUNDS[:, 0], BOUNDS[:, 1], (n, len(GENES)))
+    genomes[:, INTEGER] = np.round(genomes[:, INTEGER])
+    return genomes
+
+
 class Population(creator.Airfoil):
-    """Collection of random airfoils."""
+    """Collection of random airfoils.
+
+    Randomness is deterministic: every generation draws from its own
+    stream, spawned from the population's seed & the generation number,
+    and workers get independent streams spawned from the generation's.
+    """
 
-    def __init__(self, size):
+    def __init__(self, size, seed=None):
         af = creator.Airfoil
         # print(af)
         self.size = size
         self.gen_number = 0  # incremented for every generation
+        # Surrogate shared by every generation's pre-screening
+        self.surrogate = surrogate.Surrogate()
+        # Results of every unique design evaluated so far
+        self.index = dedup.DesignIndex()
+        # Root of all random streams, recorded for reproducibility
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.rng = self.get_rng()
+        self.genomes = random_genomes(self.rng, size)
+        # Evaluated results of every individual, NaN until evaluated
+        self.results = np.full((size, len(RESULTS)), np.nan)
+
+    def get_seed_sequence(self, *key):
+        """Return the seed sequence of the current generation (& key)."""
+        return np.random.SeedSequence(self.entropy,
+                                      spawn_key=(self.gen_number,) + key)
+
+    def get_rng(self):
+        """Return a new random Generator for the current generation."""
+        return np.random.Generator(np.random.PCG64(self.get_seed_sequence()))
+
+    def get_worker_rngs(self, n_workers):
+        """Return independent random Generators for n_workers workers."""
+        return [np.random.Generator(np.random.PCG64(seq))
+                for seq in self.get_seed_sequence().spawn(n_workers)]
+
+    def get_rng_state(self):
+        """Return the full random state, restored by set_rng_state()."""
+        return {'entropy': self.entropy,
+                'gen_number': self.gen_number,
+                'bit_generator': self.rng.bit_generator.state}
+
+    def set_rng_state(self, state):
+        """Restore a random state saved by get_rng_state()."""
+        self.entropy = state['entropy']
+        self.gen_number = state['gen_number']
+        self.rng = self.get_rng()
+        self.rng.bit_generator.state = state['bit_generator']
+        return None
+
+    def next_generation(self):
+        """Move on to the next generation & its random stream."""
+        self.gen_number += 1
+        self.rng = self.get_rng()
+        return None
+
+    def evaluate(self, genomes=None, **kwargs):
+        """Evaluate genomes, pre-screened by the population's surrogate.
+
+        Designs already evaluated by the population are not evaluated
+        again. The population's own genomes are evaluated by default,
+        and their results stored.
+        """
+        if genomes is not None:
+            return sweep(genomes, self.surrogate, index=self.index, **kwargs)
+        self.results = sweep(self.genomes, self.surrogate, index=self.index,
+                             **kwargs)
+        return self.results
 
     def mutate(self, prob_mt):
-        """Randomly mutate the genes of prob_mt % of the population."""
+        """Randomly mutate the genes of prob_mt % of the population.
+
+        Every gene mutates with probability prob_mt (0-1); the mask &
+        the new values are drawn for the whole genome matrix at once.
+        """
+        mask = self.rng.random(self.genomes.shape) < prob_mt
+        values = random_genomes(self.rng, len(self.genomes))
+        self.genomes[mask] = values[mask]
+        return None
 
     def crossover(self, prob_cx):
-        """Combine the genes of prob_cx % of the population."""
+        """Combine the genes of prob_cx % of the population.
+
+        Individuals are randomly paired; prob_cx (0-1) of the pairs
+        swap their genes past a random single crossover point.
+        """
+        order = self.rng.permutation(len(self.genomes))
+        n_pairs = len(order) // 2
+        first, second = order[:n_pairs], order[n_pairs:2 * n_pairs]
+        mask = self.rng.random(n_pairs) < prob_cx
+        points = self.rng.integers(1, len(GENES), n_pairs)
+        swap = (np.arange(len(GENES)) >= points[:, np.newaxis])
+        swap &= mask[:, np.newaxis]
+        a = self.genomes[first]
+        b = self.genomes[second]
+        self.genomes[first] = np.where(swap, b, a)
+        self.genomes[second] = np.where(swap, a, b)
+        return None
 
     def reproduce(self, prob_rp):
         """Pass on the genes of the fittest prob_rp % of the population."""
@@ -0,0 +1,137 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The importer.py module reads airfoil coordinate files
+(Selig & Lednicer '.dat' formats) and re-panels them
+onto the chordwise stations used by creator.Airfoil.
+
+Functions:
+    parse_dat(text): split a '.dat' file's text into both surfaces.
+    read_dat(file_path): read a single '.dat' file.
+    read_dir(directory): read every '.dat' file of a directory.
+    repanel(upper, lower, stations): interpolate surfaces onto stations.
+    repanel_many(surfaces, stations): repanel several airfoils at once.
+"""
+
+import os
+import glob
+import numpy as np
+
+
+def parse_dat(text):
+    """Parse the text of a Selig or Lednicer '.dat' file.
+
+    The whole coordinate block is converted by NumPy in one pass.
+
+    Return:
+    name: airfoil name, read from the first line.
+    upper: (2, n) array, upper surface from LE to TE, unit chord.
+    lower: (2, n) array, lower surface from LE to TE, unit chord.
+    """
+    name, _, body = text.partition('\n')
+    data = np.array(body.split(), dtype=float)
+    if data.size % 2 or data.size < 6:
+        raise ValueError('Malformed coordinate file: {}'.format(name))
+    data = data.reshape(-1, 2)
+
+    # Lednicer files start with the number of points of each surface.
+    if data[0, 0] > 1.5 and data[0, 1] > 1.5:
+        n_upper, n_lower = data[0].astype(int)
+        upper = data[1:1 + n_upper]
+        lower = data[1 + n_upper:1 + n_upper + n_lower]
+    # Selig files loop from the TE, around the LE, back to the TE.
+    else:
+        le = np.argmin(data[:, 0])
+        upper = data[:le + 1][::-1]
+        lower = data[le:]
+
+    # Some files list the lower surface first.
+    if np.mean(upper[:, 1]) < np.mean(lower[:, 1]):
+        upper, lower = lower, upper
+
+    # Normalize to a unit chord starting at the origin.
+    x_le = min(upper[0, 0], lower[0, 0])
+    chord = max(upper[-1, 0], lower[-1, 0]) - x_le
+    upper = (upper - [x_le, 0]) / chord
+    lower = (lower - [x_le, 0]) / chord
+    return name.strip(), upper.T, lower.T
+
+
+def read_dat(file_path):
+    """Read a single Selig or Lednicer '.dat' file."""
+    with open(file_path) as f:
+        return parse_dat(f.read())
+
+
+def read_dir(directory, pattern='*.dat'):
+    """Read every coordinate file of a directory.
+
+    Unreadable files are reported and skipped.
+
+    Return:
+    surfaces: dictionary of {name: (upper, lower)}.
+    """
+    surfaces = {}
+    for file_path in sorted(glob.glob(os.path.join(directory, pattern))):
+        try:
+            name, upper, lower = read_dat(file_path)
+        except (IOError, ValueError, UnicodeDecodeError):
+            print('Unable to read {}, skipping.'.format(file_path))
+            continue
+        key = os.path.splitext(os.path.basename(file_path))[0]
+        surfaces[key] = (upper, lower)
+    return surfaces
+
+
+def _interp(surface, x):
+    """Interpolate a surface's z-coordinates, x being monotonic."""
+    order = np.argsort(surface[0], kind='stable')
+    return np.interp(x, surface[0][order], surface[1][order])
+
+
+def repanel(upper, lower, stations):
+    """Interpolate unit chord surfaces onto chordwise stations.
+
+    Parameters:
+    upper, lower: (2, n) unit chord surfaces from parse_dat().
+    stations: increasing x-coordinates, from the LE (0) to the TE (chord).
+
+    Return:
+    z_u, z_l: upper & lower surface z-coordinates at every station.
+    """
+    stations = np.asarray(stations, dtype=float)
+    chord = stations[-1]
+    z_u = _interp(upper, stations / chord) * chord
+    z_l = _interp(lower, stations / chord) * chord
+    return z_u, z_l
+
+
+def repanel_many(surfaces, stations):
+    """Repanel several airfoils onto the same stations.
+
+    Parameters:
+    surfaces: dictionary of {name: (upper, lower)}, from read_dir().
+    stations: increasing x-coordinates, from the LE (0) to the TE (chord).
+
+    Return:
+    names: list of airfoil names, in row order.
+    z_u, z_l: (n_airfoils, n_stations) arrays of z-coordinates.
+    """
+    names = list(surfaces)
+    z_u = np.empty((len(names), len(stations)))
+    z_l = np.empty((len(names), len(stations)))
+    for i, name in enumerate(names):
+        z_u[i], z_l[i] = repanel(*surfaces[name], stations)
+    return names, z_u, z_l
@@ -0,0 +1,177 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The loads.py module contains the spanwise load distributions
+applied to the wing by the evaluator.
+
+A load model is a function of the spanwise stations 'y' and the
+semi-span, returning the distribution normalized to a unit sum over
+the stations: a magnitude is the total load of the semi-span.
+Magnitudes are arrays of flight conditions, so that one distribution
+is reused for every load case: loads have shape (case, station).
+
+Classes:
+    LiftingLine: Prandtl lifting-line solution of a given planform.
+
+Functions:
+    rectangular(y, semi_span): constant distribution.
+    elliptical(y, semi_span): elliptical distribution.
+    schrenk(y, semi_span, chord): Schrenk's approximation.
+    step(y, semi_span, cutoff, factor): constant, increased near the tip.
+    get_loads(model, y, semi_span, magnitudes): loads of every case.
+"""
+
+import numpy as np
+
+
+def _normalize(shape):
+    """Scale a distribution to a unit sum over the stations."""
+    return shape / shape.sum()
+
+
+def rectangular(y, semi_span):
+    """Constant distribution."""
+    return _normalize(np.ones(len(y)))
+
+
+def elliptical(y, semi_span):
+    """Elliptical distribution, zero at the tip."""
+    y = np.asarray(y, dtype=float)
+    return _normalize(np.sqrt(np.clip(1 - (y / semi_span)**2, 0, None)))
+
+
+def schrenk(y, semi_span, chord=None):
+    """Schrenk's approximation: average of planform & elliptical shapes.
+
+    chord is the chord at every station; a rectangular planform is
+    assumed if it is omitted.
+    """
+    if chord is None:
+        planform = rectangular(y, semi_span)
+    else:
+        planform = _normalize(np.asarray(chord, dtype=float))
+    return (planform + elliptical(y, semi_span)) / 2
+
+
+def step(y, semi_span, cutoff=0.8, factor=1.25):
+    """Constant distribution, multiplied by factor past cutoff x semi-span."""
+    shape = np.ones(len(y))
+    shape[round(cutoff * semi_span):] = factor
+    return _normalize(shape)
+
+
+class LiftingLine:
+    """Prandtl lifting-line solution of a symmetric planform.
+
+    The Fourier coefficient system is solved once, for a unit angle
+    of attack and for the wing's twist; both are linear, so the lift
+    distribution of any total lift follows without another solve.
+    The twist's contribution scales with the dynamic pressure q,
+    which must then be given for every flight condition.
+
+    Parameters:
+    semi_span: wing semi-span.
+    chord: chord, scalar or function of the spanwise location y.
+    twist: geometric twist minus zero-lift angle (rad), same form.
+    a_0: section lift curve slope (1/rad).
+    n_terms: number of odd Fourier terms.
+    """
+
+    def __init__(self, semi_span, chord, twist=0, a_0=2 * np.pi,
+                 n_terms=32):
+        self.semi_span = semi_span
+        # Collocation points, root (theta = pi/2) to near the tip
+        theta = np.arange(1, n_terms + 1) * np.pi / (2 * n_terms)
+        n = 2 * np.arange(n_terms) + 1
+        y = semi_span * np.cos(theta)
+        c = np.broadcast_to(chord(y) if callable(chord) else chord, y.shape)
+        t = np.broadcast_to(twist(y) if callable(twist) else twist, y.shape)
+        # alpha(theta) = sum A_n sin(n theta) (4 b / (a_0 c) + n / sin theta)
+        b = 2 * semi_span
+        sin_n = np.sin(np.outer(theta, n))
+        M = sin_n * (4 * b / (a_0 * c[:, np.newaxis])
+                     + n / np.sin(theta)[:, np.newaxis])
+        # Coefficients for a unit angle of attack & for the twist
+        self.A = np.linalg.solve(M, np.column_stack((np.ones(len(y)), t)))
+        self.n = n
+
+    def __str__(self):
+        return type(self).__name__
+
+    def get_shapes(self, y):
+        """Return l(y) / q for a unit angle of attack & for the twist."""
+        theta = np.arccos(np.clip(np.asarray(y, dtype=float)
+                                  / self.semi_span, -1, 1))
+        # l = rho V Gamma = q 4 b sum A_n sin(n theta)
+        return 8 * self.semi_span * np.sin(np.outer(theta, self.n)) @ self.A
+
+    def __call__(self, y, semi_span):
+        """Distribution per unit total lift of the untwisted wing."""
+        shape = self.get_shapes(y)[:, 0]
+        return shape / shape.sum()
+
+    def get_loads(self, y, magnitudes, q=None):
+        """Return the lift distribution of every total semi-span lift.
+
+        The angle of attack of every flight condition is found from
+        the total lift: alpha L_alpha q + L_twist q = L.
+
+        Parameters:
+        y: spanwise stations.
+        magnitudes: total semi-span lift of every flight condition.
+        q: dynamic pressure of every flight condition, required
+           if the wing is twisted.
+        """
+        L = np.asarray(magnitudes, dtype=float)
+        if q is None:
+            if np.any(self.A[:, 1]):
+                raise ValueError('A twisted wing needs the dynamic pressure '
+                                 'q of every flight condition.')
+            q = np.zeros(L.shape)
+        q = np.broadcast_to(np.asarray(q, dtype=float), L.shape)
+        shapes = self.get_shapes(y)
+        L_alpha, L_twist = shapes.sum(axis=0)
+        alpha_q = (L - L_twist * q) / L_alpha
+        return np.outer(alpha_q, shapes[:, 0]) + np.outer(q, shapes[:, 1])
+
+
+# Load models available by name
+MODELS = {
+    'rectangular': rectangular,
+    'elliptical': elliptical,
+    'schrenk': schrenk,
+    'step': step,
+}
+
+
+def get_loads(model, y, semi_span, magnitudes, q=None):
+    """Return the (case, station) loads of every load magnitude.
+
+    Parameters:
+    model: name in MODELS, load model function or LiftingLine.
+    y: spanwise stations.
+    semi_span: wing semi-span.
+    magnitudes: total semi-span load of every flight condition.
+    q: dynamic pressure of every flight condition (LiftingLine only).
+
+    Return:
+    loads: (len(magnitudes), len(y)) array.
+    """
+    if isinstance(model, str):
+        model = MODELS[model]
+    magnitudes = np.atleast_1d(np.asarray(magnitudes, dtype=float))
+    if hasattr(model, 'get_loads'):
+        return model.get_loads(y, magnitudes, q)
+    return np.outer(magnitudes, model(y, semi_span))
@@ -0,0 +1,273 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The pareto.py module extracts the non-dominated designs
+of a sweep or genetic algorithm run from its columnar results.
+
+All objectives are minimized; get_objectives() flips the sign
+of the results which must be maximized (inertia, margin).
+Rows with any non-finite objective (e.g. skipped designs) are left
+out of the ranking: they are never on the front, get the last rank
+and no crowding distance.
+
+Classes:
+    ParetoFront: non-dominated set, updated as new results stream in.
+
+Functions:
+    get_objectives(results, sense): results to minimization objectives.
+    get_front(F): mask of the non-dominated designs.
+    get_ranks(F): front number of every design (0 is non-dominated).
+    get_crowding(F, ranks): crowding distance of every design.
+"""
+
+import bisect as bi
+import numpy as np
+
+# Objective sense of generator.RESULTS: 1 to minimize, -1 to maximize
+SENSE = (1, -1, -1, -1)
+# Maximum number of elements of the brute force dominance temporaries
+CHUNK = 1 << 22
+# Largest number of pairs compared by brute force in the recursive filter
+SMALL = 1 << 12
+
+
+def get_objectives(results, sense=SENSE):
+    """Return minimization objectives from a results array.
+
+    Rows holding NaN (e.g. skipped designs) get +inf objectives,
+    so that they never dominate any evaluated design.
+    """
+    F = np.asarray(results, dtype=float) * np.asarray(sense)
+    return np.where(np.isnan(F), np.inf, F)
+
+
+def _dominated_by(A, B, strict=True):
+    """Return the mask of the rows of A dominated by any row of B.
+
+    With strict=False, rows of A equal to a row of B also count.
+    Rows of A are compared by chunks, so that temporaries stay below
+    CHUNK elements.
+    """
+    mask = np.zeros(len(A), dtype=bool)
+    if not len(A) or not len(B):
+        return mask
+    step = max(1, CHUNK // (len(B) * A.shape[1]))
+    for i in range(0, len(A), step):
+        a = A[i:i + step, np.newaxis, :]
+        dominated = np.all(B <= a, axis=-1)
+        if strict:
+            dominated &= np.any(B < a, axis=-1)
+        mask[i:i + step] = np.any(dominated, axis=-1)
+    return mask
+
+
+def _covered(A, B):
+    """Return the mask of the rows of A weakly dominated by a row of B.
+
+    Kung's filter, recursive on the dimension: both sets are split at
+    the median of their first objective; the lower halves & the upper
+    halves are filtered on all objectives, and the upper half of A by
+    the lower half of B on the remaining objectives only. Two
+    objectives are swept in sorted order, one is a minimum.
+    """
+    mask = np.zeros(len(A), dtype=bool)
+    if not len(A) or not len(B):
+        return mask
+    d = A.shape[1]
+    if d == 1:
+        return A[:, 0] >= B[:, 0].min()
+    if d == 2:
+        # Sweep the first objective, rows of B first on ties
+        first = np.concatenate((A[:, 0], B[:, 0]))
+        second = np.concatenate((A[:, 1], B[:, 1]))
+        in_a = np.arange(len(first)) < len(A)
+        order = np.lexsort((in_a, first))
+        best = np.minimum.accumulate(np.where(in_a, np.inf, second)[order])
+        covered = np.empty(len(first), dtype=bool)
+        covered[order] = best <= second[order]
+        return covered[:len(A)]
+    if len(A) * len(B) <= SMALL:
+        return _dominated_by(A, B, strict=False)
+
+    pivot = np.median(np.concatenate((A[:, 0], B[:, 0])))
+    low_a = A[:, 0] <= pivot
+    low_b = B[:, 0] <= pivot
+    if low_a.all() and low_b.all():
+        # The median is the maximum: split off the maximum instead
+        low_a = A[:, 0] < pivot
+        low_b = B[:, 0] < pivot
+        if not low_a.any() and not low_b.any():
+            return _covered(A[:, 1:], B[:, 1:])
+    mask[low_a] = _covered(A[low_a], B[low_b])
+    mask[~low_a] = _covered(A[~low_a], B[~low_b])
+    high = np.flatnonzero(~low_a & ~mask)
+    mask[high] = _covered(A[high, 1:], B[low_b, 1:])
+    return mask
+
+
+def _front_2d(F):
+    """Return the ranks of unique, lexicographically sorted 2D points.
+
+    Every front keeps the smallest f2 seen so far; those minima are
+    increasing, so the front of each point is found by bisection.
+    """
+    ranks = np.empty(len(F), dtype=int)
+    minima = []
+    for i, f2 in enumerate(F[:, 1]):
+        k = bi.bisect_right(minima, f2)
+        if k == len(minima):
+            minima.append(f2)
+        else:
+            minima[k] = f2
+        ranks[i] = k
+    return ranks
+
+
+def _front_nd(F):
+    """Return the non-dominated mask of unique, sorted points (Kung).
+
+    The sorted points are split in halves; since a point can only be
+    dominated by points sorted before it, the bottom half's front is
+    filtered by the top half's front only. Top points are no worse
+    in the first objective, so the filter (see _covered()) only
+    compares the remaining objectives.
+    """
+    n = len(F)
+    if n <= 32:
+        return ~_dominated_by(F, F)
+    half = n // 2
+    top = _front_nd(F[:half])
+    bottom = _front_nd(F[half:])
+    index = np.flatnonzero(bottom)
+    bottom[index[_covered(F[half:][index, 1:], F[:half][top, 1:])]] = False
+    return np.concatenate((top, bottom))
+
+
+def _unique_sorted(F):
+    """Return unique rows in lexicographic order & the inverse index."""
+    return np.unique(F, axis=0, return_inverse=True)
+
+
+def _finite(F):
+    """Return the mask of the rows of F whose objectives are all finite."""
+    return np.all(np.isfinite(F), axis=1)
+
+
+def get_front(F):
+    """Return the mask of the non-dominated, finite rows of F."""
+    F = np.asarray(F, dtype=float)
+    finite = _finite(F)
+    mask = np.zeros(len(F), dtype=bool)
+    if not finite.any():
+        return mask
+    unique, inverse = _unique_sorted(F[finite])
+    if F.shape[1] == 2:
+        front = _front_2d(unique) == 0
+    else:
+        front = _front_nd(unique)
+    mask[finite] = front[inverse.ravel()]
+    return mask
+
+
+def get_ranks(F):
+    """Return the front number of every row of F (non-dominated sorting).
+
+    Two objectives are sorted in O(n log n); more objectives peel off
+    one divide & conquer front at a time. Non-finite rows get the
+    last rank, after every finite row's.
+    """
+    F = np.asarray(F, dtype=float)
+    finite = _finite(F)
+    all_ranks = np.zeros(len(F), dtype=int)
+    if not finite.any():
+        return all_ranks
+    unique, inverse = _unique_sorted(F[finite])
+    if F.shape[1] == 2:
+        ranks = _front_2d(unique)
+    else:
+        ranks = np.full(len(unique), -1)
+        remaining = np.arange(len(unique))
+        rank = 0
+        while len(remaining):
+            front = _front_nd(unique[remaining])
+            ranks[remaining[front]] = rank
+            remaining = remaining[~front]
+            rank += 1
+    all_ranks[finite] = ranks[inverse.ravel()]
+    all_ranks[~finite] = ranks.max() + 1
+    return all_ranks
+
+
+def get_crowding(F, ranks):
+    """Return the crowding distance of every row of F within its front.
+
+    Boundary designs of every front get an infinite distance;
+    non-finite rows are left out and get a zero distance.
+    """
+    F = np.asarray(F, dtype=float)
+    ranks = np.asarray(ranks)
+    finite = _finite(F)
+    crowding = np.zeros(len(F))
+    for rank in np.unique(ranks[finite]):
+        index = np.flatnonzero((ranks == rank) & finite)
+        if len(index) <= 2:
+            crowding[index] = np.inf
+            continue
+        for f in F[index].T:
+            order = np.argsort(f, kind='stable')
+            f = f[order]
+            span = f[-1] - f[0]
+            distance = np.empty(len(f))
+            distance[[0, -1]] = np.inf
+            distance[1:-1] = (f[2:] - f[:-2]) / (span if span > 0 else 1)
+            crowding[index[order]] += distance
+    return crowding
+
+
+class ParetoFront:
+    """Non-dominated set of designs, updated as results stream in."""
+
+    def __init__(self, sense=SENSE):
+        self.sense = sense
+        self.F = np.empty((0, len(sense)))
+        self.ids = np.empty(0, dtype=int)
+
+    def __str__(self):
+        return type(self).__name__
+
+    def __len__(self):
+        return len(self.ids)
+
+    def update(self, results, ids):
+        """Merge new results into the front.
+
+        Parameters:
+        results: (n, n_objectives) results, as in generator.RESULTS.
+        ids: (n,) design identifiers, e.g. row numbers in a sweep.
+
+        Return:
+        Mask of the new designs which entered the front.
+        """
+        F = get_objectives(results, self.sense)
+        ids = np.asarray(ids)
+        new = get_front(F) & ~_dominated_by(F, self.F)
+        keep = ~_dominated_by(self.F, F[new])
+        self.F = np.vstack((self.F[keep], F[new]))
+        self.ids = np.concatenate((self.ids[keep], ids[new]))
+        return new
+
+    def get_results(self):
+        """Return the front's results, in the original sense."""
+        return self.F * np.asarray(self.sense)
@@ -0,0 +1,257 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The regression.py module guards against numerical drift: golden data
+is generated once with the reference implementation (add_naca,
+Spar.add_coord, Stringer.add_coord, get_centroid & get_inertia_terms)
+over a randomized corpus, then any engine is compared against it.
+
+Golden data is a dictionary of arrays, saved compressed:
+    inputs: (n, len(INPUTS)) corpus parameters.
+    offsets: (n + 1) start of every case's booms in the boom arrays.
+    boom_x, boom_z, boom_area: booms of all cases, concatenated.
+    n_caps: (n) number of spar caps of every case.
+    centroid: (n, 2) centroid coordinates.
+    inertia: (n, 3) I_x, I_z & I_xz.
+    surfaces: (m, 2) NACA number & chord of the unique surfaces.
+    surface: (n) surface of every case, a row of surfaces.
+    surface_offsets: (m + 1) start of every surface's points.
+    surface_x, surface_z: surface points (x, z) of all surfaces.
+    camber_offsets: (m + 1) start of every surface's camber line.
+    camber_x, camber_z: camber lines (x_c, z_c) of all surfaces.
+References produced elsewhere (e.g. by the MATLAB scripts in
+wing_scripts/) can be compared once saved in the same format.
+
+Functions:
+    random_corpus(n, seed): random corpus parameters.
+    generate(inputs): golden data from the reference implementation.
+    save(golden, file_path) & load(file_path): compressed storage.
+    section_engine(golden): vectorized centroid & inertia from booms.
+    surface_engine(golden): surfaces from generator.get_surface().
+    compare(golden, outputs, rtol, atol): worst case report.
+"""
+
+import numpy as np
+from tools import creator, evaluator, generator
+
+# Corpus parameters: NACA number, chord, then a genome (see GENES)
+INPUTS = ('naca_num', 'chord') + generator.GENES
+# Quantities compared, with their default tolerances (rtol, atol)
+TOLERANCES = {
+    'centroid': (1e-9, 1e-9),
+    'inertia': (1e-9, 1e-9),
+    'boom_x': (0, 1e-9),
+    'boom_z': (0, 1e-9),
+    'surface_x': (0, 1e-9),
+    'surface_z': (0, 1e-9),
+    'camber_x': (0, 1e-9),
+    'camber_z': (0, 1e-9),
+}
+# Offsets of the concatenated quantities, by key prefix
+OFFSETS = {
+    'boom': 'offsets',
+    'surface': 'surface_offsets',
+    'camber': 'camber_offsets',
+}
+
+
+def random_corpus(n, seed=0, n_surfaces=256):
+    """Return n random corpus cases (see INPUTS).
+
+    Cases share n_surfaces random (NACA number, chord) pairs,
+    since generating a surface costs far more than placing booms.
+    """
+    rng = np.random.default_rng(seed)
+    # 4-digit NACA: camber (%), camber position (1/10), thickness (%)
+    m = rng.integers(0, 7, n_surfaces)
+    p = np.where(m > 0, rng.integers(2, 7, n_surfaces), 0)
+    t = rng.integers(6, 25, n_surfaces)
+    naca = 1000 * m + 100 * p + t
+    chord = rng.integers(40, 151, n_surfaces)
+    surface = rng.integers(0, n_surfaces, n)
+    genomes = generator.random_genomes(rng, n)
+    return np.column_stack((naca[surface], chord[surface], genomes))
+
+
+def generate(inputs):
+    """Run the reference implementation over every corpus case."""
+    inputs = np.atleast_2d(inputs)
+    boom_x, boom_z, boom_area = [], [], []
+    n_caps = np.empty(len(inputs), dtype=int)
+    offsets = np.zeros(len(inputs) + 1, dtype=int)
+    centroid = np.empty((len(inputs), 2))
+    inertia = np.empty((len(inputs), 3))
+    for i, case in enumerate(inputs):
+        naca = '{:04d}'.format(int(case[0]))
+        af = generator.new_airfoil(case[2:], naca, int(case[1]))
+        ev = evaluator.Evaluator(af)
+        ev.centroid = ev.get_centroid()
+        x, z, area = ev.get_booms()
+        boom_x.append(x)
+        boom_z.append(z)
+        boom_area.append(area)
+        n_caps[i] = 2 * len(af.spar.x)
+        offsets[i + 1] = offsets[i] + len(x)
+        centroid[i] = ev.centroid
+        inertia[i] = ev.get_inertia_terms()
+
+    # Surfaces only depend on the NACA number & chord: stored once each
+    surfaces, surface = np.unique(inputs[:, :2], axis=0, return_inverse=True)
+    surface_x, surface_z, camber_x, camber_z = [], [], [], []
+    for naca, chord in surfaces:
+        af = creator.Airfoil.from_dimensions(int(chord),
+                                             creator.Airfoil.semi_span)
+        af.add_naca('{:04d}'.format(int(naca)))
+        surface_x.append(af.x)
+        surface_z.append(af.z)
+        camber_x.append(af.x_c)
+        camber_z.append(af.z_c)
+    return {'inputs': np.asarray(inputs, dtype=float),
+            'offsets': offsets,
+            'boom_x': np.concatenate(boom_x),
+            'boom_z': np.concatenate(boom_z),
+            'boom_area': np.concatenate(boom_area),
+            'n_caps': n_caps,
+            'centroid': centroid,
+            'inertia': inertia,
+            'surfaces': np.asarray(surfaces, dtype=float),
+            'surface': surface.reshape(-1),
+            'surface_offsets': _get_offsets(surface_x),
+            'surface_x': np.concatenate(surface_x),
+            'surface_z': np.concatenate(surface_z),
+            'camber_offsets': _get_offsets(camber_x),
+            'camber_x': np.concatenate(camber_x),
+            'camber_z': np.concatenate(camber_z)}
+
+
+def _get_offsets(arrays):
+    """Return the start of every array once concatenated, & the end."""
+    return np.concatenate(([0], np.cumsum([len(a) for a in arrays])))
+
+
+def save(golden, file_path):
+    """Save golden data to a compressed '.npz' file."""
+    np.savez_compressed(file_path, **golden)
+    return None
+
+
+def load(file_path):
+    """Load golden data saved by save()."""
+    with np.load(file_path) as data:
+        return {k: data[k] for k in data.files}
+
+
+def section_engine(golden):
+    """Compute the centroid & inertia terms of every case at once.
+
+    Segment sums over the concatenated booms replace the per-case
+    loops. Like get_inertia_terms(), the inertia terms only include
+    the caps of the first spar.
+    """
+    starts = golden['offsets'][:-1]
+    case = np.repeat(np.arange(len(starts)), np.diff(golden['offsets']))
+    x, z, area = golden['boom_x'], golden['boom_z'], golden['boom_area']
+
+    def segment_sum(values):
+        return np.add.reduceat(values, starts)
+
+    total = segment_sum(area)
+    c_x = segment_sum(area * x) / total
+    c_z = segment_sum(area * z) / total
+    dx = x - c_x[case]
+    dz = z - c_z[case]
+    # Caps of the spars past the first one are left out.
+    rank = np.arange(len(x)) - starts[case]
+    used = ~((rank >= 2) & (rank < golden['n_caps'][case]))
+    I_x = segment_sum(used * area * dz**2)
+    I_z = segment_sum(used * area * dx**2)
+    I_xz = segment_sum(used * area * dx * dz)
+    return {'centroid': np.column_stack((c_x, c_z)),
+            'inertia': np.column_stack((I_x, I_z, I_xz))}
+
+
+def surface_engine(golden):
+    """Return the surfaces of golden data, from generator.get_surface()."""
+    surfaces = [generator.get_surface('{:04d}'.format(int(naca)), int(chord))
+                for naca, chord in golden['surfaces']]
+    return {'surface_x': np.concatenate([x for x, _, _, _ in surfaces]),
+            'surface_z': np.concatenate([z for _, z, _, _ in surfaces]),
+            'camber_x': np.concatenate([x_c for _, _, x_c, _ in surfaces]),
+            'camber_z': np.concatenate([z_c for _, _, _, z_c in surfaces])}
+
+
+def compare(golden, outputs, tolerances=None, n_worst=5):
+    """Compare an engine's outputs against golden data.
+
+    Parameters:
+    golden: golden data, from generate() or load().
+    outputs: dictionary of arrays, with any keys of TOLERANCES.
+    tolerances: {key: (rtol, atol)}, overriding TOLERANCES.
+    n_worst: number of worst cases reported per quantity.
+
+    Return:
+    report: {key: dictionary of max_abs, max_rel, n_failed & worst},
+            worst being a list of (case, abs. error, inputs); surface
+            quantities are reported per surface instead of per case.
+    """
+    tol = dict(TOLERANCES, **(tolerances or {}))
+    report = {}
+    for key, value in outputs.items():
+        rtol, atol = tol[key]
+        ref = np.asarray(golden[key], dtype=float)
+        value = np.asarray(value, dtype=float)
+        if value.shape != ref.shape:
+            raise ValueError('{}: expected shape {}, got {}'.format(
+                key, ref.shape, value.shape))
+        err = np.abs(value - ref)
+        failed = err > atol + rtol * np.abs(ref)
+        if err.ndim > 1:
+            err = err.max(axis=1)
+            failed = failed.any(axis=1)
+        # Concatenated arrays are compared per point, reported per
+        # case (booms) or per surface (surface & camber points).
+        prefix = key.split('_')[0]
+        if prefix in OFFSETS:
+            starts = golden[OFFSETS[prefix]][:-1]
+            err = np.maximum.reduceat(err, starts)
+            failed = np.logical_or.reduceat(failed, starts)
+        if prefix in ('surface', 'camber'):
+            names, rows = INPUTS[:2], golden['surfaces']
+        else:
+            names, rows = INPUTS, golden['inputs']
+        rel = np.max(np.abs(value - ref) / np.maximum(np.abs(ref), 1e-300))
+        worst = np.argsort(err)[::-1][:n_worst]
+        report[key] = {
+            'max_abs': float(err.max()),
+            'max_rel': float(rel),
+            'n_failed': int(failed.sum()),
+            'worst': [(int(i), float(err[i]),
+                       dict(zip(names, rows[i].tolist())))
+                      for i in worst],
+        }
+    return report
+
+
+def print_report(report):
+    """Print a comparison report to the terminal."""
+    for key, value in report.items():
+        status = 'FAILED' if value['n_failed'] else 'passed'
+        print('{}: {} ({} failed cases), max abs. error {:.3e}, '
+              'max rel. error {:.3e}'.format(key, status, value['n_failed'],
+                                             value['max_abs'],
+                                             value['max_rel']))
+        for case, err, inputs in value['worst']:
+            print('    case {}: {:.3e} {}'.format(case, err, inputs))
+    return None
@@ -0,0 +1,270 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The report.py module writes structured reports for many designs,
+without going through stdout like info_print() & info_save().
+
+Records are flat dictionaries of scalars, one per design, streamed
+to CSV, JSON lines or HTML files through a buffered writer, while
+summary statistics are accumulated for the whole batch: the count,
+mean & sum of squared deviations of every chunk are merged with
+Chan's parallel update, which is stable for large means.
+
+Classes:
+    Report: streaming report writer with batch summary statistics.
+
+Functions:
+    get_record(obj): structured record of a component or evaluator.
+    get_summary(evaluator): flat record of an evaluated design.
+    iter_records(genomes, results): records from sweep result arrays.
+"""
+
+import csv
+import html
+import json
+import numbers
+import os.path
+import numpy as np
+from tools import generator
+
+# Write buffer size (bytes) & number of records formatted at once
+BUFFER_SIZE = 1 << 20
+CHUNK = 1024
+
+
+def _to_builtin(value):
+    """Convert numpy values to JSON serializable built-in types.
+
+    NaN (e.g. a design skipped by a sweep) becomes None.
+    """
+    if isinstance(value, np.ndarray):
+        return _to_builtin(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, dict):
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    return value
+
+
+def get_record(obj):
+    """Return the attributes of a component or evaluator as a dictionary.
+
+    Nested components (e.g. an airfoil's spar) are replaced by their
+    name, since they are reported on their own.
+    """
+    record = {'name': str(obj)}
+    for k, v in obj.__dict__.items():
+        if hasattr(v, '__dict__') and not isinstance(v, np.ndarray):
+            record[k] = str(v)
+        else:
+            record[k] = _to_builtin(v)
+    return record
+
+
+def get_summary(evaluator, **extra):
+    """Return a flat record of scalars describing an evaluated design.
+
+    Parameters:
+    evaluator: Evaluator instance, after analysis().
+    extra: any other fields, e.g. a design number or its genes.
+    """
+    record = dict(extra)
+    record.update({
+        'naca_num': str(getattr(evaluator.airfoil, 'naca_num', '')),
+        'chord': evaluator.chord,
+        'semi_span': evaluator.semi_span,
+        'mass': evaluator.mass_total,
+        'centroid_x': evaluator.centroid[0],
+        'centroid_z': evaluator.centroid[1],
+        'I_x': evaluator.I_['x'],
+        'I_z': evaluator.I_['z'],
+        'I_xz': evaluator.I_['xz'],
+        'margin': evaluator.margin_min if len(evaluator.margin) else None,
+    })
+    return _to_builtin(record)
+
+
+def iter_records(genomes, results, start=0):
+    """Yield one record per row of sweep genomes & results."""
+    for i, (genes, result) in enumerate(zip(genomes, results), start):
+        record = {'design': i}
+        record.update(zip(generator.GENES, genes.tolist()))
+        record.update(zip(generator.RESULTS, result.tolist()))
+        yield _to_builtin(record)
+
+
+class Report:
+    """Streaming report of many designs.
+
+    Parameters:
+    file_path: full path of the report; the format ('csv', 'jsonl' or
+               'html') is deduced from its extension unless given.
+    fields: columns of CSV & HTML reports, the first record's keys
+            by default.
+
+    If the file cannot be opened, a message is printed and records
+    are only accumulated into the summary statistics.
+    """
+
+    def __init__(self, file_path, fmt=None, fields=None):
+        self.file_path = file_path
+        self.fmt = fmt or os.path.splitext(file_path)[1][1:].lower()
+        if self.fmt not in ('csv', 'jsonl', 'html'):
+            raise ValueError('Unknown report format: {}'.format(self.fmt))
+        self.fields = list(fields) if fields else None
+        self.n_records = 0
+        self.pending = []
+        # Running statistics of every numeric field
+        self.stats = {}
+        try:
+            self.file = open(file_path, 'w', newline='',
+                             buffering=BUFFER_SIZE)
+        except IOError:
+            self.file = None
+            print('Unable to write {} to specified directory.\n'.format(
+                file_path), 'Was the full path passed to the function?')
+        self.csv = None
+        self.started = False
+
+    def __str__(self):
+        return type(self).__name__
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def _update_stats(self, records):
+        """Merge the count, mean, M2, min & max of a chunk (Chan et al.)."""
+        for field in self.fields:
+            values = np.array([r.get(field) for r in records], dtype=object)
+            numeric = np.array([isinstance(v, numbers.Real)
+                                and not isinstance(v, bool)
+                                for v in values])
+            if not numeric.any():
+                continue
+            x = values[numeric].astype(float)
+            x = x[np.isfinite(x)]
+            if not len(x):
+                continue
+            s = self.stats.setdefault(field, {'count': 0, 'mean': 0.0,
+                                              'M2': 0.0,
+                                              'min': np.inf, 'max': -np.inf})
+            # M2: sum of squared deviations from the mean
+            n_b = len(x)
+            mean_b = float(x.mean())
+            M2_b = float(((x - mean_b)**2).sum())
+            n = s['count'] + n_b
+            delta = mean_b - s['mean']
+            s['mean'] += delta * n_b / n
+            s['M2'] += M2_b + delta**2 * s['count'] * n_b / n
+            s['count'] = n
+            s['min'] = min(s['min'], float(x.min()))
+            s['max'] = max(s['max'], float(x.max()))
+        return None
+
+    def _write_header(self):
+        """Write the CSV header or the opening of the HTML table."""
+        if self.fmt == 'csv':
+            self.csv = csv.DictWriter(self.file, self.fields,
+                                      extrasaction='ignore')
+            self.csv.writeheader()
+        elif self.fmt == 'html':
+            self.file.write('<html><body><table border="1">\n<tr>'
+                            + ''.join('<th>{}</th>'.format(html.escape(str(f)))
+                                      for f in self.fields)
+                            + '</tr>\n')
+        return None
+
+    def _flush(self):
+        """Format & write all pending records at once."""
+        records = self.pending
+        self.pending = []
+        if not records:
+            return None
+        if self.fields is None:
+            self.fields = list(records[0])
+        if self.file is None:
+            self._update_stats(records)
+            return None
+        if not self.started:
+            self._write_header()
+            self.started = True
+
+        if self.fmt == 'csv':
+            self.csv.writerows(records)
+        elif self.fmt == 'jsonl':
+            self.file.write(''.join(json.dumps(_to_builtin(r)) + '\n'
+                                    for r in records))
+        else:
+            self.file.write(''.join(
+                '<tr>' + ''.join('<td>{}</td>'.format(
+                    html.escape(str(r.get(f, '')))) for f in self.fields)
+                + '</tr>\n' for r in records))
+        self._update_stats(records)
+        return None
+
+    def write(self, record):
+        """Queue a record; records are written by chunks."""
+        self.pending.append(record)
+        self.n_records += 1
+        if len(self.pending) >= CHUNK:
+            self._flush()
+        return None
+
+    def write_many(self, records):
+        """Stream an iterable of records to the report."""
+        for record in records:
+            self.write(record)
+        return None
+
+    def get_stats(self):
+        """Return {field: count, mean, std, min & max} of the batch."""
+        self._flush()
+        stats = {}
+        for field, s in self.stats.items():
+            stats[field] = {'count': s['count'], 'mean': s['mean'],
+                            'std': (s['M2'] / s['count'])**0.5,
+                            'min': s['min'], 'max': s['max']}
+        return stats
+
+    def close(self):
+        """Write pending records (and the HTML summary), close the file."""
+        stats = self.get_stats()
+        if self.file is None:
+            return None
+        if self.fmt == 'html':
+            if not self.started:
+                self.file.write('<html><body><table border="1">\n')
+            self.file.write('</table>\n<h2>Summary</h2>\n<table border="1">'
+                            '\n<tr><th>field</th><th>count</th><th>mean</th>'
+                            '<th>std</th><th>min</th><th>max</th></tr>\n')
+            for field, s in stats.items():
+                self.file.write(
+                    '<tr><td>{}</td><td>{}</td><td>{:.6g}</td><td>{:.6g}</td>'
+                    '<td>{:.6g}</td><td>{:.6g}</td></tr>\n'.format(
+                        html.escape(str(field)), s['count'], s['mean'],
+                        s['std'], s['min'], s['max']))
+            self.file.write('</table></body></html>\n')
+        self.file.close()
+        print('Successfully wrote {} records to file {}'.format(
+            self.n_records, self.file_path))
+        return None
@@ -0,0 +1,233 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The server.py module contains a local evaluation service, so that
+the GUI, notebooks & sweep drivers share a single warm worker pool
+and a single result cache instead of each evaluating on their own.
+
+Clients send one JSON object per line, {"genes": [...]}, over a Unix
+socket (or localhost TCP) and receive one JSON object per line,
+{"result": {...}} or {"error": "..."}. Requests arriving within a few
+milliseconds of each other are merged into a single batch.
+
+Classes:
+    Server: asyncio server with micro-batching & a shared result cache.
+
+Functions:
+    evaluate_batch(genomes): evaluate a batch of genomes (in a worker).
+    request(genes, path, host, port): synchronous client.
+"""
+
+import os
+import json
+import socket
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from tools import generator
+
+# Default Unix socket path & localhost port
+SOCKET_PATH = '/tmp/mae154b.sock'
+PORT = 8154
+
+
+def _warm():
+    """Worker initializer: import & run the pipeline once."""
+    generator.default_airfoil()
+
+
+def evaluate_batch(genomes, kwargs=None):
+    """Evaluate a batch of genomes, return a list of result lists."""
+    return [generator.evaluate(genes, **(kwargs or {})).tolist()
+            for genes in genomes]
+
+
+class Server:
+    """Local evaluation service.
+
+    Parameters:
+    path: Unix socket path; if None, listen on localhost:port instead.
+    port: TCP port, only used when path is None.
+    workers: number of worker processes (CPU count by default).
+    window: micro-batching window (s).
+    max_batch: maximum number of genomes in a batch.
+    max_cache: maximum number of cached results, least recently used
+               results are evicted first.
+    """
+
+    def __init__(self, path=SOCKET_PATH, port=PORT, workers=None,
+                 window=0.005, max_batch=64, max_cache=1 << 16):
+        self.path = path
+        self.port = port
+        self.workers = workers or os.cpu_count()
+        self.window = window
+        self.max_batch = max_batch
+        self.max_cache = max_cache
+        # LRU result cache shared by all clients, and in-flight requests
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.queue = None
+        self.pool = None
+        self.n_batches = 0
+
+    def __str__(self):
+        return type(self).__name__
+
+    async def handle(self, reader, writer):
+        """Answer every request line of a client connection."""
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                genes = json.loads(line)['genes']
+                result = await self.submit(genes)
+                reply = {'result': dict(zip(generator.RESULTS, result))}
+            except Exception as error:
+                reply = {'error': repr(error)}
+            writer.write((json.dumps(reply) + '\n').encode())
+            await writer.drain()
+        writer.close()
+        return None
+
+    async def submit(self, genes):
+        """Return a genome's results, from the cache or the next batch."""
+        key = tuple(float(gene) for gene in genes)
+        if len(key) != len(generator.GENES):
+            raise ValueError('Expected genes: {}'.format(generator.GENES))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        future = asyncio.get_running_loop().create_future()
+        # Identical in-flight requests share the same evaluation.
+        if key in self.pending:
+            self.pending[key].append(future)
+        else:
+            self.pending[key] = [future]
+            await self.queue.put(key)
+        return await future
+
+    async def batcher(self):
+        """Merge queued requests into batches, dispatch them to workers."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
+            loop.create_task(self.dispatch(batch))
+
+    async def dispatch(self, batch):
+        """Evaluate a batch, split evenly across the workers."""
+        loop = asyncio.get_running_loop()
+        self.n_batches += 1
+        size = -(-len(batch) // self.workers)
+        chunks = [batch[i:i + size] for i in range(0, len(batch), size)]
+        try:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(self.pool, evaluate_batch, chunk)
+                for chunk in chunks])
+        except Exception as error:
+            for key in batch:
+                for future in self.pending.pop(key, []):
+                    future.set_exception(error)
+            return None
+        for chunk, chunk_results in zip(chunks, results):
+            for key, result in zip(chunk, chunk_results):
+                self.cache[key] = result
+                if len(self.cache) > self.max_cache:
+                    self.cache.popitem(last=False)
+                for future in self.pending.pop(key, []):
+                    future.set_result(result)
+        return None
+
+    def _remove_stale_socket(self):
+        """Remove a socket file left by a dead server.
+
+        Raise RuntimeError if a live server still listens on it.
+        """
+        if not os.path.exists(self.path):
+            return None
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.remove(self.path)
+            return None
+        finally:
+            probe.close()
+        raise RuntimeError('A server is already listening on {}'.format(
+            self.path))
+
+    async def serve(self):
+        """Start the worker pool & serve forever."""
+        if self.path is not None:
+            self._remove_stale_socket()
+        self.queue = asyncio.Queue()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_warm)
+        if self.path is not None:
+            server = await asyncio.start_unix_server(self.handle, self.path)
+        else:
+            server = await asyncio.start_server(self.handle, '127.0.0.1',
+                                                self.port)
+        batcher = asyncio.get_running_loop().create_task(self.batcher())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.pool.shutdown()
+        return None
+
+    def run(self):
+        """Blocking entry point."""
+        asyncio.run(self.serve())
+        return None
+
+
+def request(genes, path=SOCKET_PATH, port=PORT):
+    """Evaluate a single genome through a running server.
+
+    Return:
+    Dictionary of results (see generator.RESULTS).
+    """
+    if path is not None:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+    else:
+        client = socket.create_connection(('127.0.0.1', port))
+    with client, client.makefile('rw') as f:
+        f.write(json.dumps({'genes': [float(gene) for gene in genes]}) + '\n')
+        f.flush()
+        reply = json.loads(f.readline())
+    if 'error' in reply:
+        raise RuntimeError(reply['error'])
+    return reply['result']
+
+
+def main():
+    Server().run()
+    return None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The sizing.py module contains a gradient-based optimizer which sizes
+the spar caps & stringers of an evaluated airfoil for minimum mass.
+
+The centroid & inertia terms are closed-form sums over the booms,
+so their derivatives are computed analytically, for all booms at once.
+
+Classes:
+    Sizer: minimizes boom mass subject to inertia & stress constraints.
+
+Functions:
+    get_section_properties(x, z, area): centroid & inertia terms.
+    get_jacobians(x, z, area): derivatives of the section properties.
+    get_stress(x, z, area, M_x, M_z): bending stress at every boom.
+    get_stress_jacobian(x, z, area, M_x, M_z): derivative of the stress.
+"""
+
+import numpy as np
+from scipy.optimize import minimize
+
+
+def get_section_properties(x, z, area):
+    """Return the centroid & inertia terms of a set of booms.
+
+    Parameters:
+    x, z: boom coordinates.
+    area: boom areas.
+
+    Return:
+    centroid: (x, z) coordinates of the centroid.
+    inertia: (I_x, I_z, I_xz) inertia terms.
+    """
+    total = np.sum(area)
+    c_x = np.dot(area, x) / total
+    c_z = np.dot(area, z) / total
+    dx = x - c_x
+    dz = z - c_z
+    I_x = np.dot(area, dz**2)
+    I_z = np.dot(area, dx**2)
+    I_xz = np.dot(area, dx * dz)
+    return (c_x, c_z), (I_x, I_z, I_xz)
+
+
+def get_jacobians(x, z, area):
+    """Return the derivatives of the section properties.
+
+    Since the first moment of area about the centroid is zero,
+    the centroid's own variation drops out of the inertia derivatives.
+
+    Return:
+    dictionary of (2, n) centroid & (3, n) inertia Jacobians
+    with regard to the boom areas ('area'), x ('x') & z ('z').
+    """
+    (c_x, c_z), _ = get_section_properties(x, z, area)
+    total = np.sum(area)
+    dx = x - c_x
+    dz = z - c_z
+    zero = np.zeros(len(x))
+    return {
+        'centroid': {
+            'area': np.vstack((dx, dz)) / total,
+            'x': np.vstack((area / total, zero)),
+            'z': np.vstack((zero, area / total)),
+        },
+        'inertia': {
+            'area': np.vstack((dz**2, dx**2, dx * dz)),
+            'x': np.vstack((zero, 2 * area * dx, area * dz)),
+            'z': np.vstack((2 * area * dz, zero, area * dx)),
+        },
+    }
+
+
+def get_stress(x, z, area, M_x, M_z):
+    """Return the bending stress at every boom for every load case.
+
+    Same convention as Evaluator.get_bending_stress();
+    M_x & M_z are 1D arrays of load cases.
+    """
+    (c_x, c_z), (I_x, I_z, I_xz) = get_section_properties(x, z, area)
+    M_x = np.asarray(M_x, dtype=float)[:, np.newaxis]
+    M_z = np.asarray(M_z, dtype=float)[:, np.newaxis]
+    a = I_x * M_z - I_xz * M_x
+    b = I_z * M_x - I_xz * M_z
+    D = I_x * I_z - I_xz**2
+    return -(a * (x - c_x) + b * (z - c_z)) / D
+
+
+def get_stress_jacobian(x, z, area, M_x, M_z):
+    """Return the derivative of every boom stress with regard to every area.
+
+    Return:
+    (load case, boom k, area j) array of d(sigma_k) / d(A_j).
+    """
+    (c_x, c_z), (I_x, I_z, I_xz) = get_section_properties(x, z, area)
+    jac = get_jacobians(x, z, area)
+    dI_x, dI_z, dI_xz = jac['inertia']['area']
+    dc_x, dc_z = jac['centroid']['area']
+    # Load cases along axis 0, stressed boom k along 1, area j along 2
+    M_x = np.asarray(M_x, dtype=float)[:, np.newaxis, np.newaxis]
+    M_z = np.asarray(M_z, dtype=float)[:, np.newaxis, np.newaxis]
+    dx = (x - c_x)[:, np.newaxis]
+    dz = (z - c_z)[:, np.newaxis]
+
+    a = I_x * M_z - I_xz * M_x
+    b = I_z * M_x - I_xz * M_z
+    D = I_x * I_z - I_xz**2
+    da = dI_x * M_z - dI_xz * M_x
+    db = dI_z * M_x - dI_xz * M_z
+    dD = dI_x * I_z + I_x * dI_z - 2 * I_xz * dI_xz
+
+    num = a * dx + b * dz
+    d_num = da * dx + db * dz - a * dc_x - b * dc_z
+    return -(d_num * D - num * dD) / D**2
+
+
+class Sizer:
+    """Sizes the spar caps & stringers of an evaluated airfoil.
+
+    The design variables are the spar cap area and the stringer area.
+    Mass is minimized subject to minimum inertia terms and, at the wing
+    root for every load case, the allowables of Evaluator.get_margins():
+    material yield, column & skin panel buckling of the booms, and shear
+    yield of the webs. Boom positions stay fixed.
+    """
+
+    def __init__(self, evaluator, load_factors=(1,), rib_spacing=24,
+                 I_x_min=0, I_z_min=0):
+        self.evaluator = evaluator
+        self.rib_spacing = rib_spacing
+        self.I_min = np.array([I_x_min, I_z_min], dtype=float)
+        self.x, self.z, _ = evaluator.get_booms()
+        n_caps = 2 * len(evaluator.spar.x)
+        # Maps the 2 design variables onto the n boom areas.
+        self.P = np.zeros((len(self.x), 2))
+        self.P[:n_caps, 0] = 1
+        self.P[n_caps:, 1] = 1
+        # Material properties & allowables of every boom
+        spar_mat = evaluator.spar.get_material()
+        stringer_mat = evaluator.stringer.get_material()
+        self.rho = self.P @ [spar_mat['rho'], stringer_mat['rho']]
+        self.allow = evaluator.get_allowables(rib_spacing)
+        self.F_ty = self.allow['F_ty']
+        # Root loads of every load case
+        n = np.asarray(load_factors, dtype=float)
+        V_z, M_x = evaluator.get_spanwise_loads(evaluator.lift_total)
+        V_x, M_z = evaluator.get_spanwise_loads(evaluator.drag)
+        self.M_x = n * M_x[0]
+        self.M_z = n * M_z[0]
+        # Web shear does not depend on the boom areas
+        self.tau = evaluator.get_web_shear(n * V_x[0], n * V_z[0])
+        self.n_evals = 0
+        self.result = None
+
+    def __str__(self):
+        return type(self).__name__
+
+    def get_mass(self, design):
+        """Return the mass of the booms, and its gradient."""
+        grad = self.evaluator.semi_span * (self.rho @ self.P)
+        return float(grad @ design), grad
+
+    def get_constraints(self, design):
+        """Return all constraints (feasible if >= 0), and their Jacobian."""
+        self.n_evals += 1
+        area = self.P @ design
+        _, inertia = get_section_properties(self.x, self.z, area)
+        jac = get_jacobians(self.x, self.z, area)
+        # Inertia terms
+        g_I = np.array(inertia[:2]) - self.I_min
+        dg_I = jac['inertia']['area'][:2] @ self.P
+        # Yield in tension & compression: F_ty -/+ sigma >= 0
+        sigma = get_stress(self.x, self.z, area, self.M_x, self.M_z)
+        d_sigma = get_stress_jacobian(self.x, self.z, area,
+                                      self.M_x, self.M_z) @ self.P
+        g_t = (self.F_ty - sigma).ravel()
+        g_c = (self.F_ty + sigma).ravel()
+        dg_t = -d_sigma.reshape(-1, 2)
+        dg_c = d_sigma.reshape(-1, 2)
+        # Column buckling: sigma_cr + sigma >= 0, sigma_cr = pi^2 E A / 12L^2
+        k = self.allow['column']
+        g_b = (k * area + sigma).ravel()
+        dg_b = (np.diag(k) @ self.P + d_sigma).reshape(-1, 2)
+        # Skin panel buckling: sigma_skin + sigma >= 0
+        g_s = (self.allow['skin'] + sigma).ravel()
+        dg_s = d_sigma.reshape(-1, 2)
+        # Web shear yield, independent of the design
+        tau_spar, tau_skin = self.tau
+        g_w = np.concatenate((1 - np.abs(tau_spar) / self.allow['spar'],
+                              1 - np.abs(tau_skin) / self.allow['skin_shear']))
+        dg_w = np.zeros((len(g_w), 2))
+        # Constraints are normalized for the optimizer's sake.
+        I_scale = np.where(self.I_min > 0, self.I_min, 1)
+        F_scale = np.tile(self.F_ty, 4 * len(self.M_x))
+        g = np.concatenate((g_I / I_scale,
+                            np.concatenate((g_t, g_c, g_b, g_s)) / F_scale,
+                            g_w))
+        dg = np.vstack((dg_I / I_scale[:, np.newaxis],
+                        np.vstack((dg_t, dg_c, dg_b, dg_s))
+                        / F_scale[:, np.newaxis],
+                        dg_w))
+        return g, dg
+
+    def optimize(self, design=None, bounds=(1e-3, 10), tol=1e-6):
+        """Run the SLSQP optimizer from an initial design.
+
+        Parameters:
+        design: initial (cap_area, stringer_area), airfoil's by default.
+        bounds: lower & upper bound of both areas.
+        tol: convergence tolerance.
+
+        Return:
+        result: scipy.optimize.OptimizeResult of the run.
+        """
+        if design is None:
+            design = [self.evaluator.spar.cap_area,
+                      self.evaluator.stringer.area]
+        self.n_evals = 0
+        self.result = minimize(
+            lambda d: self.get_mass(d)[0], np.asarray(design, dtype=float),
+            jac=lambda d: self.get_mass(d)[1], method='SLSQP',
+            bounds=[bounds] * 2, tol=tol,
+            constraints={'type': 'ineq',
+                         'fun': lambda d: self.get_constraints(d)[0],
+                         'jac': lambda d: self.get_constraints(d)[1]})
+        return self.result
+
+    def apply(self):
+        """Write the optimized areas back to the airfoil's components."""
+        cap_area, stringer_area = self.result.x
+        self.evaluator.spar.add_spar_caps(cap_area)
+        self.evaluator.stringer.add_area(stringer_area)
+        return None
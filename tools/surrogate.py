@@ -0,0 +1,174 @@
+# This file is part of Marius Peter's airfoil analysis package (this program).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+The surrogate.py module contains a single Surrogate class,
+a cheap response surface fitted on already evaluated designs,
+used to skip candidates which are clearly infeasible.
+"""
+
+import time
+import numpy as np
+
+
+class Surrogate:
+    """Radial basis function response surface.
+
+    Cubic radial basis functions with a linear polynomial tail
+    regress every output column on the design parameters.
+    Inputs are normalized to the unit hypercube of the known designs.
+
+    The cost of a fit stays bounded: at most max_centers evenly spaced
+    known designs serve as centers, the regularized normal equations
+    are solved by Cholesky factorization, and the model is only refit
+    once the number of known designs has doubled since the last fit.
+
+    Every holdout-th known design is first left out of the fit; the
+    residuals of those designs measure the prediction error, from which
+    screen() derives how far below the threshold a prediction must be
+    for the design to be clearly infeasible.
+
+    Parameters:
+    min_fit: number of known designs before the first fit.
+    max_centers: maximum number of basis function centers.
+    smoothing: ridge regularization, relative to the system's diagonal.
+    holdout: one known design in 'holdout' is held out of the first fit.
+    safety: factor applied to the largest held-out residual.
+    """
+
+    def __init__(self, min_fit=20, max_centers=256, smoothing=1e-8,
+                 holdout=4, safety=2):
+        self.min_fit = min_fit
+        self.max_centers = max_centers
+        self.smoothing = smoothing
+        self.holdout = holdout
+        self.safety = safety
+        # Known designs & their evaluated outputs
+        self.X = np.empty((0, 0))
+        self.Y = np.empty((0, 0))
+        # Fitted model
+        self.centers = np.empty((0, 0))
+        self.weights = np.empty((0, 0))
+        self.lo = np.empty(0)
+        self.scale = np.empty(0)
+        # Held-out residuals (evaluated - predicted) of the last fit
+        self.residuals = np.empty((0, 0))
+        # Number of known designs at the last fit
+        self.n_fit = 0
+        # Time of a single prediction (s)
+        self.cost = np.inf
+
+    def __str__(self):
+        return type(self).__name__
+
+    def __len__(self):
+        return len(self.X)
+
+    def add(self, X, Y):
+        """Add evaluated designs, and refit if they doubled since the last.
+
+        Parameters:
+        X: (n, n_params) design parameters.
+        Y: (n, n_outputs) evaluated outputs, e.g. mass, I_x, I_z, margin.
+
+        Return:
+        None
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        Y = np.atleast_2d(np.asarray(Y, dtype=float))
+        keep = np.all(np.isfinite(Y), axis=1)
+        if len(self.X) == 0:
+            self.X = X[keep]
+            self.Y = Y[keep]
+        else:
+            self.X = np.vstack((self.X, X[keep]))
+            self.Y = np.vstack((self.Y, Y[keep]))
+        if len(self.X) >= max(self.min_fit, 2 * self.n_fit):
+            self.fit()
+        return None
+
+    def _kernel(self, X):
+        """Return the basis function & polynomial matrices at X."""
+        X = (X - self.lo) / self.scale
+        r = np.sqrt(((X[:, np.newaxis, :] - self.centers)**2).sum(axis=-1))
+        P = np.hstack((np.ones((len(X), 1)), X))
+        return r**3, P
+
+    def fit(self, n=None):
+        """Fit the model on the first n known designs (all by default)."""
+        n = len(self.X) if n is None else n
+        X, Y = self.X[:n], self.Y[:n]
+        self.lo = X.min(axis=0)
+        ptp = np.ptp(X, axis=0)
+        self.scale = np.where(ptp > 0, ptp, 1)
+        rows = np.unique(np.linspace(0, n - 1, min(n, self.max_centers))
+                         .astype(int))
+        self.centers = (X[rows] - self.lo) / self.scale
+        B = np.hstack(self._kernel(X))
+        held = np.zeros(n, dtype=bool)
+        held[self.holdout // 2::self.holdout] = True
+        # Regularized normal equations: (B^T B + lambda I) w = B^T Y,
+        # solved without the held-out designs, then with all of them.
+        A_held = B[held].T @ B[held]
+        A = B[~held].T @ B[~held]
+        ridge = self.smoothing * max(A.trace() + A_held.trace(), 1)
+        A[np.diag_indices_from(A)] += ridge
+        weights = self._solve(A, B[~held].T @ Y[~held])
+        self.residuals = Y[held] - B[held] @ weights
+        self.weights = self._solve(A + A_held, B.T @ Y)
+        self.n_fit = n
+
+        # Time a few predictions, for callers to weigh against evaluations
+        sample = X[:min(n, 64)]
+        tic = time.perf_counter()
+        self.predict(sample)
+        self.cost = (time.perf_counter() - tic) / len(sample)
+        return None
+
+    @staticmethod
+    def _solve(A, b):
+        """Solve A x = b for a symmetric positive definite A (Cholesky)."""
+        L = np.linalg.cholesky(A)
+        return np.linalg.solve(L.T, np.linalg.solve(L, b))
+
+    def get_slack(self, column=-1):
+        """Return the error allowed below the threshold by screen().
+
+        The largest held-out underprediction of 'column',
+        times the safety factor.
+        """
+        if len(self.residuals) == 0:
+            return np.inf
+        return self.safety * max(float(self.residuals[:, column].max()), 0)
+
+    def predict(self, X):
+        """Return the predicted outputs of (n, n_params) designs."""
+        Phi, P = self._kernel(np.atleast_2d(np.asarray(X, dtype=float)))
+        return np.hstack((Phi, P)) @ self.weights
+
+    def screen(self, X, column=-1, threshold=0, slack=None):
+        """Return the mask of designs worth a full evaluation.
+
+        A design is skipped when its predicted output in 'column'
+        (the margin of safety, by default) is below threshold - slack.
+        The slack is derived from the held-out residuals (see
+        get_slack()) unless given.
+        Every design passes while the surrogate is not fitted yet.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if len(self.weights) == 0:
+            return np.ones(len(X), dtype=bool)
+        if slack is None:
+            slack = self.get_slack(column)
+        return self.predict(X)[:, column] >= threshold - slack